@@ -1,24 +1,78 @@
-from flask import Flask, request, jsonify
-from flask_sqlalchemy import SQLAlchemy
+from flask import Flask, Response, g, request, jsonify, stream_with_context
 from flask_migrate import Migrate
 from flask_cors import CORS
-from flask_mail import Mail, Message
+from flask_mail import Mail
+from werkzeug.middleware.proxy_fix import ProxyFix
+from sqlalchemy.engine import make_url
 from dotenv import load_dotenv
+from functools import wraps
+import hmac
+import json
+import logging
 import os
+import time
+import uuid
+
+from ingest import IngestError, ingest, iter_records, validate_record
+from limiter import Decision, create_limiter
+from pagination import InvalidCursor, keyset_page, parse_datetime
+from search import SubmissionSearch, include_object
+from mail_transport import MailTransport
+from metrics import Registry, SamplingProfiler, configure_logging, pool_stats
+from models import ContactSubmission, OutboxMessage, db
+from outbox import OutboxDispatcher
 
 load_dotenv()
 
+configure_logging(os.getenv("LOG_LEVEL", "INFO"))
+log = logging.getLogger("contact")
+
 app = Flask(__name__)
 CORS(app)
 
+# Number of proxies in front of the app whose X-Forwarded-For is trusted,
+# so rate limiting sees the real client IP
+if int(os.getenv("PROXY_FIX_X_FOR", 0)):
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=int(os.getenv("PROXY_FIX_X_FOR")))
+
 # ---------------------------------------
 # DATABASE CONFIG
 # ---------------------------------------
 app.config["SQLALCHEMY_DATABASE_URI"] = os.getenv("DATABASE_URL")
 app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
 
-db = SQLAlchemy(app)
-migrate = Migrate(app, db)
+
+def engine_options(url):
+    """
+    Connection pool settings, per process. Each gunicorn worker gets its own
+    pool, so the database sees up to
+    workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW) connections.
+
+    By default the pool fits one worker: a connection for each of its
+    GUNICORN_THREADS request threads plus one for the outbox thread, with
+    a little overflow for scrapes and searches.
+    """
+    options = {
+        # Drop connections the server or a proxy closed while idle
+        "pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "True") == "True",
+        # Recycle before typical server / load balancer idle timeouts
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", 1800)),
+    }
+    # In-memory SQLite uses a single-connection pool without these knobs
+    url = make_url(url)
+    if not (url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")):
+        options.update(
+            pool_size=int(os.getenv("DB_POOL_SIZE", int(os.getenv("GUNICORN_THREADS", 1)) + 1)),
+            max_overflow=int(os.getenv("DB_MAX_OVERFLOW", 2)),
+            pool_timeout=int(os.getenv("DB_POOL_TIMEOUT", 10)),
+        )
+    return options
+
+
+app.config["SQLALCHEMY_ENGINE_OPTIONS"] = engine_options(app.config["SQLALCHEMY_DATABASE_URI"])
+
+db.init_app(app)
+migrate = Migrate(app, db, include_object=include_object)
 
 # ---------------------------------------
 # MAIL CONFIG
@@ -29,22 +83,244 @@ app.config["MAIL_USE_TLS"] = os.getenv("MAIL_USE_TLS") == "True"
 app.config["MAIL_USERNAME"] = os.getenv("MAIL_USERNAME")
 app.config["MAIL_PASSWORD"] = os.getenv("MAIL_PASSWORD")
 app.config["MAIL_DEFAULT_SENDER"] = os.getenv("MAIL_USERNAME")
+app.config["MAIL_POOL_SIZE"] = int(os.getenv("MAIL_POOL_SIZE", 4))
+app.config["MAIL_POOL_MAX_AGE"] = float(os.getenv("MAIL_POOL_MAX_AGE", 300))
+app.config["MAIL_POOL_MAX_MESSAGES"] = int(os.getenv("MAIL_POOL_MAX_MESSAGES", 100))
+
+# ---------------------------------------
+# RATE LIMIT CONFIG
+# ---------------------------------------
+app.config["RATE_LIMIT_STORAGE_URL"] = os.getenv("RATE_LIMIT_STORAGE_URL")
+app.config["RATE_LIMIT_IP_PER_MINUTE"] = float(os.getenv("RATE_LIMIT_IP_PER_MINUTE", 10))
+app.config["RATE_LIMIT_IP_BURST"] = int(os.getenv("RATE_LIMIT_IP_BURST", 10))
+app.config["RATE_LIMIT_EMAIL_PER_MINUTE"] = float(os.getenv("RATE_LIMIT_EMAIL_PER_MINUTE", 5))
+app.config["RATE_LIMIT_EMAIL_BURST"] = int(os.getenv("RATE_LIMIT_EMAIL_BURST", 5))
+app.config["DEDUPE_WINDOW_MINUTES"] = float(os.getenv("DEDUPE_WINDOW_MINUTES", 10))
 
 ADMIN_EMAIL = os.getenv("ADMIN_EMAIL")
+ADMIN_API_TOKEN = os.getenv("ADMIN_API_TOKEN")
 
 mail = Mail(app)
+mail_transport = MailTransport(app, mail)
+
+limiter = create_limiter(app.config)
+
+
+# ---------------------------------------
+# METRICS
+# ---------------------------------------
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+PROFILER_ENABLED = os.getenv("PROFILER_ENABLED") == "True"
+
+# Set by gunicorn.conf.py so every worker reports the same totals; see metrics.py
+metrics = Registry(
+    os.getenv("METRICS_MULTIPROC_DIR"),
+    flush_interval=float(os.getenv("METRICS_FLUSH_INTERVAL", 5)),
+)
+
+REQUEST_SECONDS = metrics.histogram(
+    "http_request_duration_seconds", "Time to handle a request", ["method", "endpoint", "status"]
+)
+REQUESTS = metrics.counter(
+    "http_requests", "Requests handled", ["method", "endpoint", "status"]
+)
+STAGE_SECONDS = metrics.histogram(
+    "contact_stage_duration_seconds", "Time spent in each stage of a submission", ["stage"]
+)
+MAIL_MESSAGES = metrics.counter(
+    "mail_messages", "Outbox messages handed to the SMTP server", ["result"]
+)
+with app.app_context():
+    db_engine = db.engine
+
+# Summed over running workers; each has its own pool
+metrics.gauge(
+    "db_pool_connections", "SQLAlchemy connection pool utilization",
+    lambda: pool_stats(db_engine), ["state"], shared="live"
+)
+# Read from the database, so whichever worker serves the scrape reports it
+metrics.gauge(
+    "outbox_pending_messages", "Outbox messages waiting to be sent",
+    lambda: OutboxMessage.query.filter_by(status="pending").count()
+)
+metrics.callback_counter(
+    "contact_limiter_events", "Rate limiter and dedupe decisions",
+    limiter.stats, ["event"]
+)
+
+
+def send_batch(messages, transport=mail_transport):
+    with STAGE_SECONDS.time(stage="mail"):
+        results = transport.send_batch(messages)
+    for error in results:
+        MAIL_MESSAGES.inc(result="sent" if error is None else "failed")
+    return results
+
+
+search_index = SubmissionSearch(db, ContactSubmission)
+
+
+# ---------------------------------------
+# OUTBOX DISPATCHER
+# ---------------------------------------
+outbox = OutboxDispatcher(
+    app, db, OutboxMessage, send_batch,
+    batch_size=int(os.getenv("OUTBOX_BATCH_SIZE", 20)),
+    poll_interval=float(os.getenv("OUTBOX_POLL_INTERVAL", 1.0)),
+    max_attempts=int(os.getenv("OUTBOX_MAX_ATTEMPTS", 5)),
+    backoff_base=float(os.getenv("OUTBOX_BACKOFF_BASE", 2.0)),
+    # 0 disables digests; otherwise switch to a digest once more than
+    # MAIL_DIGEST_THRESHOLD submissions arrive within MAIL_DIGEST_WINDOW seconds
+    digest_threshold=int(os.getenv("MAIL_DIGEST_THRESHOLD", 0)),
+    digest_window=float(os.getenv("MAIL_DIGEST_WINDOW", 300)),
+    # A dispatcher that dies mid-send releases its rows after this many seconds
+    claim_timeout=float(os.getenv("OUTBOX_CLAIM_TIMEOUT", 300)),
+    # Sent, digested and failed rows are deleted after this many days; 0 keeps them
+    retention=float(os.getenv("OUTBOX_RETENTION_DAYS", 7)) * 86400,
+)
+
+# "thread" runs the dispatcher inside each web worker; anything else
+# expects a separate `python outbox.py` process to drain the queue.
+OUTBOX_DISPATCHER = os.getenv("OUTBOX_DISPATCHER", "thread")
+
+
+@app.before_request
+def start_background_work():
+    """
+    Start this process's background threads: the metrics flusher and, with
+    OUTBOX_DISPATCHER=thread, the outbox dispatcher. Nothing starts on
+    import, so `flask db upgrade`, `python outbox.py` and a preloading
+    gunicorn master run none of them; gunicorn.conf.py calls this when a
+    worker boots, and otherwise the first request does.
+    """
+    metrics.start()
+    if OUTBOX_DISPATCHER == "thread":
+        outbox.start()
 
 
 # ---------------------------------------
-# CONTACT SUBMISSION MODEL
+# ADMIN AUTH
 # ---------------------------------------
-class ContactSubmission(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String(120))
-    email = db.Column(db.String(120))
-    phone = db.Column(db.String(50))
-    subject = db.Column(db.String(200))
-    message = db.Column(db.Text)
+def has_token(expected):
+    header = request.headers.get("Authorization", "")
+    token = header[7:] if header.startswith("Bearer ") else ""
+    return bool(expected) and hmac.compare_digest(token, expected)
+
+
+def require_admin(view):
+    """Allow the request only with `Authorization: Bearer <ADMIN_API_TOKEN>`."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not has_token(ADMIN_API_TOKEN):
+            return jsonify({"error": "Unauthorized"}), 401
+
+        return view(*args, **kwargs)
+    return wrapper
+
+
+# ---------------------------------------
+# REQUEST INSTRUMENTATION
+# ---------------------------------------
+@app.before_request
+def start_request():
+    request_id = request.headers.get("X-Request-ID", "")
+    g.request_id = request_id if 0 < len(request_id) <= 128 and request_id.isprintable() else uuid.uuid4().hex
+    g.request_start = time.perf_counter()
+
+    # Opt-in sampling profiler: admins send `X-Profile: 1` when PROFILER_ENABLED=True
+    if PROFILER_ENABLED and request.headers.get("X-Profile") == "1" and has_token(ADMIN_API_TOKEN):
+        g.profiler = SamplingProfiler().start()
+
+
+@app.after_request
+def finish_request(response):
+    elapsed = time.perf_counter() - g.request_start
+    endpoint = request.url_rule.rule if request.url_rule else "unmatched"
+    labels = {"method": request.method, "endpoint": endpoint, "status": response.status_code}
+
+    REQUEST_SECONDS.observe(elapsed, **labels)
+    REQUESTS.inc(**labels)
+    response.headers["X-Request-ID"] = g.request_id
+
+    profiler = g.pop("profiler", None)
+    if profiler is not None:
+        profiler.stop()
+        log.info("profile", extra={"endpoint": endpoint, "samples": sum(profiler.stacks.values()),
+                                   "stacks": profiler.top()})
+
+    log.info("request", extra={**labels, "duration_ms": round(elapsed * 1000, 2)})
+    return response
+
+
+# ---------------------------------------
+# NOTIFICATIONS
+# ---------------------------------------
+def admin_notification(name, email, phone, subject, message):
+    """Outbox fields for the email sent to ADMIN_EMAIL about a new submission."""
+    return {
+        "subject": f"New Contact Form Submission: {subject}",
+        "recipient": ADMIN_EMAIL,
+        "reply_to": email,
+        "body": f"""
+New Contact Form Submission
+
+Name: {name}
+Email: {email}
+Phone: {phone}
+Subject: {subject}
+
+Message:
+{message}
+        """,
+    }
+
+
+# ---------------------------------------
+# SUBMISSIONS
+# ---------------------------------------
+# Shared by contact() and the ASGI fast path in asgi.py so both serve the
+# same responses. Each returns (status, body, headers) or None.
+SUBMITTED = {"message": "Message sent successfully"}
+
+
+def parse_json(req):
+    """
+    JSON body of a Flask request. Werkzeug raises BadRequest or
+    UnsupportedMediaType for a malformed body or non-JSON content type, and
+    both callers answer those with failed_submission's 500, as /contact
+    always has.
+    """
+    with STAGE_SECONDS.time(stage="parse"):
+        return req.get_json()
+
+
+def rejected_submission(data):
+    if not data:
+        return 400, {"error": "No data provided"}, {}
+
+    _, errors = validate_record(data, ContactSubmission)
+    if errors:
+        return 400, {"error": "Invalid submission", "details": errors}, {}
+    return None
+
+
+def limited_submission(decision):
+    if decision.outcome == Decision.DUPLICATE:
+        # Same payload seen recently (double-click, bot replay): acknowledge only
+        return 200, SUBMITTED, {}
+    if decision.outcome == Decision.RATE_LIMITED:
+        return 429, {"error": "Too many requests, please try again later"}, {
+            "Retry-After": str(max(1, round(decision.retry_after))),
+        }
+    return None
+
+
+def failed_submission(error):
+    return 500, {"error": "Failed to send message", "details": str(error)}, {}
+
+
+def json_response(status, body, headers):
+    return jsonify(body), status, headers
 
 
 # ---------------------------------------
@@ -58,11 +334,19 @@ def home():
 
 @app.route("/contact", methods=["POST"])
 def contact():
+    decision = None
     try:
-        data = request.get_json()
+        data = parse_json(request)
 
-        if not data:
-            return jsonify({"error": "No data provided"}), 400
+        rejected = rejected_submission(data)
+        if rejected:
+            return json_response(*rejected)
+
+        with STAGE_SECONDS.time(stage="limiter"):
+            decision = limiter.check(request.remote_addr, data)
+        limited = limited_submission(decision)
+        if limited:
+            return json_response(*limited)
 
         name = data.get("name")
         email = data.get("email")
@@ -70,45 +354,144 @@ def contact():
         subject = data.get("subject")
         message = data.get("message")
 
-        # Save submission in DB
-        new_entry = ContactSubmission(
-            name=name,
-            email=email,
-            phone=phone,
-            subject=subject,
-            message=message
-        )
-        db.session.add(new_entry)
-        db.session.commit()
+        with STAGE_SECONDS.time(stage="db"):
+            # Save submission in DB
+            new_entry = ContactSubmission(
+                name=name,
+                email=email,
+                phone=phone,
+                subject=subject,
+                message=message
+            )
+            db.session.add(new_entry)
+
+            # Queue email to ADMIN_EMAIL in the same transaction;
+            # the outbox dispatcher delivers it off the request path
+            db.session.add(OutboxMessage(**admin_notification(name, email, phone, subject, message)))
+            db.session.commit()
+
+    except Exception as e:
+        db.session.rollback()
+        if decision is not None:
+            limiter.forget(decision)
+        log.exception("contact submission failed")
+        return json_response(*failed_submission(e))
+
+    # The submission and its email are committed from here on, so nothing
+    # below may turn the response into an error the client would retry
+    outbox.notify()
+    try:
+        search_index.add(new_entry)
+    except Exception:
+        # The next search catches up on rows missing from the index
+        log.exception("indexing submission failed")
+
+    return jsonify(SUBMITTED), 200
+
 
-        # Email to ADMIN_EMAIL
-        msg = Message(
-            subject=f"New Contact Form Submission: {subject}",
-            recipients=[ADMIN_EMAIL]
+@app.route("/contact/bulk", methods=["POST"])
+@require_admin
+def contact_bulk():
+    """
+    Import many submissions at once from a JSON array or NDJSON body.
+
+    Streams back one NDJSON result line per record, then a summary line.
+    A body that is not a JSON array at all is rejected with 400 before
+    anything is streamed.
+    """
+    try:
+        records = iter_records(request.stream, request.content_type)
+    except IngestError as e:
+        return jsonify({"error": str(e)}), 400
+
+    batch_size = int(os.getenv("BULK_INSERT_BATCH_SIZE", 1000))
+
+    def generate():
+        for result in ingest(records, db.session, ContactSubmission, batch_size=batch_size):
+            yield json.dumps(result) + "\n"
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+
+@app.route("/admin/submissions", methods=["GET"])
+@require_admin
+def list_submissions():
+    """
+    List submissions newest first using keyset pagination.
+
+    Query params: limit, cursor (from the previous page's next_cursor),
+    email, subject (exact matches), created_after, created_before (ISO 8601).
+    """
+    try:
+        limit = min(max(int(request.args.get("limit", 50)), 1), 500)
+        created_after = parse_datetime(request.args.get("created_after"))
+        created_before = parse_datetime(request.args.get("created_before"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    query = ContactSubmission.query
+
+    if request.args.get("email"):
+        query = query.filter(ContactSubmission.email == request.args["email"])
+    if request.args.get("subject"):
+        query = query.filter(ContactSubmission.subject == request.args["subject"])
+    if created_after:
+        query = query.filter(ContactSubmission.created_at >= created_after)
+    if created_before:
+        query = query.filter(ContactSubmission.created_at < created_before)
+
+    try:
+        rows, next_cursor = keyset_page(
+            query, ContactSubmission.created_at, ContactSubmission.id,
+            limit, request.args.get("cursor")
         )
+    except InvalidCursor as e:
+        return jsonify({"error": str(e)}), 400
 
-        # Add Reply-To header
-        msg.reply_to = email
+    return jsonify({
+        "submissions": [row.to_dict() for row in rows],
+        "next_cursor": next_cursor,
+    }), 200
 
-        msg.body = f"""
-New Contact Form Submission
 
-Name: {name}
-Email: {email}
-Phone: {phone}
-Subject: {subject}
+@app.route("/admin/submissions/search", methods=["GET"])
+@require_admin
+def search_submissions():
+    """Ranked full-text search over submission subjects and messages."""
+    query = request.args.get("q", "").strip()
+    if not query:
+        return jsonify({"error": "Missing search query 'q'"}), 400
 
-Message:
-{message}
-        """
+    try:
+        page = max(int(request.args.get("page", 1)), 1)
+        per_page = min(max(int(request.args.get("per_page", 20)), 1), 100)
+    except ValueError:
+        return jsonify({"error": "page and per_page must be integers"}), 400
 
-        mail.send(msg)
+    total, results = search_index.search(query, page=page, per_page=per_page)
 
-        return jsonify({"message": "Message sent successfully"}), 200
+    return jsonify({
+        "results": [dict(row.to_dict(), rank=rank) for row, rank in results],
+        "total": total,
+        "page": page,
+        "per_page": per_page,
+    }), 200
 
-    except Exception as e:
-        print("EMAIL ERROR:", e)
-        return jsonify({"error": "Failed to send message", "details": str(e)}), 500
+
+@app.route("/admin/limiter", methods=["GET"])
+@require_admin
+def limiter_stats():
+    """Hit/miss counters for the /contact rate limiter and dedupe window."""
+    return jsonify(limiter.stats()), 200
+
+
+@app.route("/metrics", methods=["GET"])
+def metrics_endpoint():
+    """Prometheus scrape endpoint; requires METRICS_TOKEN when it is set."""
+    if METRICS_TOKEN and not has_token(METRICS_TOKEN):
+        return jsonify({"error": "Unauthorized"}), 401
+
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
 
 
 # ---------------------------------------
@@ -0,0 +1,443 @@
+"""
+Asyncio serving mode for the contact backend.
+
+Serves `/` and `/contact` natively on the event loop, with an async DB
+driver (asyncpg on Postgres, aiosqlite locally) behind a connection pool,
+so a single process can hold hundreds of submissions in flight while they
+wait on the database. Outbox emails are sent by an asyncio task: claiming,
+retries and digests come from the shared OutboxDispatcher, while each
+batch goes out over a pooled aiosmtplib connection honouring the same
+MAIL_POOL_* limits as the sync transport. Every other route (admin API,
+bulk import) is handed to the regular Flask app in a thread.
+
+Run with:
+    uvicorn asgi:application --host 0.0.0.0 --port 5000
+
+Responses are identical to the WSGI app in app.py.
+"""
+import asyncio
+import io
+import json
+import logging
+import os
+import time
+import uuid
+from contextlib import asynccontextmanager
+from functools import partial
+
+import aiosmtplib
+from asgiref.wsgi import WsgiToAsgi
+from sqlalchemy import insert
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine
+
+# The asyncio dispatcher below replaces the thread started by app.py
+os.environ.setdefault("OUTBOX_DISPATCHER", "asyncio")
+
+from app import (  # noqa: E402
+    REQUEST_SECONDS, REQUESTS, STAGE_SECONDS, SUBMITTED,
+    admin_notification, app, failed_submission, limited_submission, limiter,
+    metrics, outbox, parse_json, rejected_submission, send_batch,
+)
+from models import ContactSubmission, OutboxMessage  # noqa: E402
+
+
+log = logging.getLogger("contact.asgi")
+
+
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def async_database_url(url):
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for {backend!r} databases")
+    return url.set(drivername=ASYNC_DRIVERS[backend])
+
+
+def create_engine_from_env():
+    url = async_database_url(os.getenv("DATABASE_URL"))
+    options = {
+        "pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "True") == "True",
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", 1800)),
+    }
+    if url.get_backend_name() != "sqlite":
+        options.update(
+            pool_size=int(os.getenv("ASYNC_DB_POOL_SIZE", 10)),
+            max_overflow=int(os.getenv("ASYNC_DB_MAX_OVERFLOW", 20)),
+        )
+    return create_async_engine(url, **options)
+
+
+# ---------------------------------------
+# ASYNC MAIL DELIVERY
+# ---------------------------------------
+class _AsyncPooledHost:
+
+    def __init__(self, client):
+        self.client = client
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+        self.sent = 0
+
+    async def close(self):
+        try:
+            await self.client.quit()
+        except (aiosmtplib.SMTPException, OSError):
+            self.client.close()
+
+
+class AsyncSMTPPool:
+    """aiosmtplib counterpart of mail_transport.SMTPConnectionPool, with the same limits."""
+
+    def __init__(self, config, timeout=10.0):
+        self.config = config
+        self.max_age = config.get("MAIL_POOL_MAX_AGE", 300.0)
+        self.max_messages = config.get("MAIL_POOL_MAX_MESSAGES", 100)
+        self.check_after = config.get("MAIL_POOL_CHECK_AFTER", 30.0)
+        self.timeout = timeout
+
+        self._idle = []
+        self._slots = asyncio.Semaphore(config.get("MAIL_POOL_SIZE", 4))
+
+        self.opened = 0
+        self.recycled = 0
+
+    async def _open(self):
+        config = self.config
+        client = aiosmtplib.SMTP(
+            hostname=config["MAIL_SERVER"],
+            port=config["MAIL_PORT"],
+            use_tls=config.get("MAIL_USE_SSL", False),
+            start_tls=config["MAIL_USE_TLS"],
+            timeout=self.timeout,
+        )
+        await client.connect()
+        if config["MAIL_USERNAME"] and config["MAIL_PASSWORD"]:
+            await client.login(config["MAIL_USERNAME"], config["MAIL_PASSWORD"])
+
+        self.opened += 1
+        return _AsyncPooledHost(client)
+
+    async def _usable(self, pooled):
+        now = time.monotonic()
+        if not pooled.client.is_connected:
+            return False
+        if now - pooled.created_at > self.max_age or pooled.sent >= self.max_messages:
+            return False
+        if now - pooled.last_used > self.check_after:
+            try:
+                return (await pooled.client.noop()).code == 250
+            except (aiosmtplib.SMTPException, OSError):
+                return False
+        return True
+
+    async def _checkout(self):
+        while self._idle:
+            pooled = self._idle.pop()
+            if await self._usable(pooled):
+                return pooled
+            self.recycled += 1
+            await pooled.close()
+        return await self._open()
+
+    @asynccontextmanager
+    async def connection(self):
+        """Borrow a connection; it goes back to the pool unless it broke."""
+        async with self._slots:
+            pooled = await self._checkout()
+            try:
+                yield pooled
+            except asyncio.CancelledError:
+                # Cut off mid-command: drop it without waiting on a QUIT
+                pooled.client.close()
+                raise
+            except Exception:
+                await pooled.close()
+                raise
+            else:
+                pooled.last_used = time.monotonic()
+                self._idle.append(pooled)
+
+    async def send_batch(self, envelopes):
+        """
+        Send (sender, recipients, data) envelopes over a pooled connection,
+        moving on to another one when it reaches MAIL_POOL_MAX_MESSAGES.
+
+        Returns one entry per envelope, None or the exception that stopped
+        it, like MailTransport.send_batch.
+        """
+        results = []
+        while len(results) < len(envelopes):
+            try:
+                async with self.connection() as pooled:
+                    started = len(results)
+                    for sender, recipients, data in envelopes[started:]:
+                        # Back to the pool, which recycles it; a checkout always sends one
+                        if len(results) > started and pooled.sent >= self.max_messages:
+                            break
+                        try:
+                            await pooled.client.sendmail(sender, recipients, data)
+                        except (aiosmtplib.SMTPResponseException, aiosmtplib.SMTPRecipientsRefused) as e:
+                            # Rejected by the server; the connection is still usable
+                            results.append(e)
+                        else:
+                            pooled.sent += 1
+                            results.append(None)
+            except Exception as e:
+                # The connection itself failed; everything not yet sent failed with it
+                results.extend([e] * (len(envelopes) - len(results)))
+
+        return results
+
+    async def close(self):
+        while self._idle:
+            await self._idle.pop().close()
+
+
+class AsyncOutboxDispatcher:
+    """
+    Drives the shared OutboxDispatcher from the event loop.
+
+    Claiming, retries, digests and pruning run on the sync engine in a
+    worker thread, exactly as in the thread dispatcher; only the SMTP I/O
+    for each batch is handed back to the loop.
+    """
+
+    def __init__(self, settings=outbox, config=app.config):
+        self.outbox = settings
+        self.pool = AsyncSMTPPool(config)
+        self.wake = asyncio.Event()
+        self._loop = None
+        self._task = None
+        self._stopping = False
+
+    def send_timeout(self, count):
+        # Give up well before the claim expires, or another dispatcher could
+        # pick the rows up while this batch is still being delivered
+        return min(self.pool.timeout * (count + 2), self.outbox.claim_timeout / 2)
+
+    def send_batch(self, messages):
+        """Called on the worker thread inside the outbox's app context."""
+        envelopes = [(message.sender, list(message.send_to), message.as_bytes()) for message in messages]
+        future = asyncio.run_coroutine_threadsafe(self.pool.send_batch(envelopes), self._loop)
+        timeout = self.send_timeout(len(envelopes))
+        try:
+            return future.result(timeout=timeout)
+        except TimeoutError:
+            # Stop delivering before the rows go back to the queue for a retry
+            future.cancel()
+            return [TimeoutError(f"SMTP batch did not finish within {timeout:.0f}s")] * len(envelopes)
+
+    async def drain_once(self):
+        self._loop = asyncio.get_running_loop()
+        return await asyncio.to_thread(self.outbox.drain_once, partial(send_batch, transport=self))
+
+    async def run_forever(self):
+        while not self._stopping:
+            try:
+                sent = await self.drain_once()
+                await asyncio.to_thread(self.outbox.prune_if_due)
+            except Exception:
+                log.exception("outbox drain failed")
+                sent = 0
+
+            if sent < self.outbox.batch_size and not self._stopping:
+                try:
+                    await asyncio.wait_for(self.wake.wait(), self.outbox.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self.wake.clear()
+
+    def start(self):
+        self._task = asyncio.create_task(self.run_forever())
+        return self
+
+    async def close(self, timeout=10.0):
+        # Let an in-flight batch finish so its rows are marked, not left claimed
+        self._stopping = True
+        self.wake.set()
+        if self._task:
+            try:
+                await asyncio.wait_for(self._task, timeout)
+            except asyncio.TimeoutError:
+                pass
+        await self.pool.close()
+
+
+# ---------------------------------------
+# ASGI APP
+# ---------------------------------------
+class ContactASGI:
+
+    def __init__(self, flask_app):
+        self.fallback = WsgiToAsgi(flask_app)
+        self.engine = None
+        self.dispatcher = None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            return await self.lifespan(receive, send)
+
+        if scope["type"] != "http":
+            return await self.fallback(scope, receive, send)
+
+        method, path = scope["method"], scope["path"]
+
+        if (path, method) in (("/", "GET"), ("/contact", "POST")):
+            start = time.perf_counter()
+            request_id = dict(scope["headers"]).get(b"x-request-id", b"").decode(errors="replace")
+            if not 0 < len(request_id) <= 128 or not request_id.isprintable():
+                request_id = uuid.uuid4().hex
+            scope["request_id"] = request_id
+
+            if path == "/":
+                status, body, headers = 200, {"status": "Backend is running"}, {}
+            else:
+                status, body, headers = await self.contact(scope, receive)
+            headers = [(name.lower().encode(), value.encode()) for name, value in headers.items()]
+            await self.respond(scope, send, status, body, [*headers, (b"x-request-id", request_id.encode())])
+
+            elapsed = time.perf_counter() - start
+            labels = {"method": method, "endpoint": path, "status": status}
+            REQUEST_SECONDS.observe(elapsed, **labels)
+            REQUESTS.inc(**labels)
+            log.info("request", extra={**labels, "duration_ms": round(elapsed * 1000, 2), "request_id": request_id})
+            return
+
+        # CORS preflight, admin API, bulk import and everything else
+        return await self.fallback(scope, receive, send)
+
+    # ---------------------------------------
+    # LIFESPAN
+    # ---------------------------------------
+    async def startup(self):
+        self.engine = create_engine_from_env()
+        metrics.start()
+        if os.getenv("OUTBOX_DISPATCHER") == "asyncio":
+            self.dispatcher = AsyncOutboxDispatcher().start()
+
+    async def shutdown(self):
+        if self.dispatcher:
+            await self.dispatcher.close()
+        if self.engine:
+            await self.engine.dispose()
+
+    async def lifespan(self, receive, send):
+        while True:
+            event = await receive()
+            if event["type"] == "lifespan.startup":
+                try:
+                    await self.startup()
+                except Exception as e:
+                    await send({"type": "lifespan.startup.failed", "message": str(e)})
+                    return
+                await send({"type": "lifespan.startup.complete"})
+            elif event["type"] == "lifespan.shutdown":
+                await self.shutdown()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    # ---------------------------------------
+    # HTTP
+    # ---------------------------------------
+    async def respond(self, scope, send, status, body, extra_headers=()):
+        # Same serialisation as Flask's jsonify
+        payload = (json.dumps(body, separators=(",", ":"), sort_keys=True) + "\n").encode()
+        headers = [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(payload)).encode()),
+            *extra_headers,
+        ]
+
+        # Mirror Flask-CORS defaults: echo the request origin
+        origin = dict(scope["headers"]).get(b"origin")
+        if origin:
+            headers += [(b"access-control-allow-origin", origin), (b"vary", b"Origin")]
+
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": payload})
+
+    async def read_body(self, receive):
+        chunks = []
+        while True:
+            event = await receive()
+            if event["type"] == "http.disconnect":
+                raise ConnectionError("Client disconnected")
+            chunks.append(event.get("body", b""))
+            if not event.get("more_body"):
+                return b"".join(chunks)
+
+    async def run_limiter(self, method, *args):
+        # A shared store (Redis) does network I/O; keep it off the event loop
+        if limiter.blocking:
+            return await asyncio.to_thread(method, *args)
+        return method(*args)
+
+    def flask_request(self, scope, raw):
+        """A Flask request over the buffered body, so JSON parsing and its errors match app.py."""
+        headers = dict(scope["headers"])
+        return app.request_class({
+            "REQUEST_METHOD": scope["method"],
+            "PATH_INFO": scope["path"],
+            "CONTENT_TYPE": headers.get(b"content-type", b"").decode("latin-1"),
+            "CONTENT_LENGTH": str(len(raw)),
+            "wsgi.input": io.BytesIO(raw),
+        })
+
+    async def contact(self, scope, receive):
+        """Returns (status, body, headers), shaped by the same helpers as app.contact()."""
+        decision = None
+        try:
+            raw = await self.read_body(receive)
+            data = parse_json(self.flask_request(scope, raw))
+
+            rejected = rejected_submission(data)
+            if rejected:
+                return rejected
+
+            client = scope.get("client") or ("", 0)
+            with STAGE_SECONDS.time(stage="limiter"):
+                decision = await self.run_limiter(limiter.check, client[0], data)
+            limited = limited_submission(decision)
+            if limited:
+                return limited
+
+            name = data.get("name")
+            email = data.get("email")
+            phone = data.get("phone")
+            subject = data.get("subject")
+            message = data.get("message")
+
+            # Same transaction as the WSGI view: submission plus its outbox email
+            db_start = time.perf_counter()
+            async with self.engine.begin() as conn:
+                await conn.execute(insert(ContactSubmission.__table__).values(
+                    name=name,
+                    email=email,
+                    phone=phone,
+                    subject=subject,
+                    message=message
+                ))
+                await conn.execute(insert(OutboxMessage.__table__).values(
+                    **admin_notification(name, email, phone, subject, message)
+                ))
+            STAGE_SECONDS.observe(time.perf_counter() - db_start, stage="db")
+
+        except Exception as e:
+            if decision is not None:
+                await self.run_limiter(limiter.forget, decision)
+            log.exception("contact submission failed", extra={"request_id": scope.get("request_id")})
+            return failed_submission(e)
+
+        if self.dispatcher:
+            self.dispatcher.wake.set()
+
+        return 200, SUBMITTED, {}
+
+
+application = ContactASGI(app)
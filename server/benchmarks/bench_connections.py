@@ -0,0 +1,77 @@
+"""
+Show that /contact reuses pooled DB connections instead of opening one per
+request.
+
+Counts DBAPI connects while serving REQUESTS submissions at a few thread
+counts, then compares the cost of a pooled checkout with opening a fresh
+connection each time (NullPool). Uses a throwaway SQLite file unless
+DATABASE_URL is set, e.g. to a local Postgres. Exits non-zero if the
+pooled run opened more connections than DB_POOL_SIZE + DB_MAX_OVERFLOW.
+
+    python benchmarks/bench_connections.py [REQUESTS]
+"""
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import count
+
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.pool import NullPool
+
+from common import load_app, submission
+
+
+def serve(client, ids, requests, threads):
+    def post(_):
+        return client.post("/contact", json=submission(next(ids))).status_code
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(threads) as pool:
+        statuses = list(pool.map(post, range(requests)))
+    return requests / (time.perf_counter() - start), sum(status != 200 for status in statuses)
+
+
+def checkout_cost(engine, rounds=200):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+    return (time.perf_counter() - start) / rounds * 1000
+
+
+def main(requests):
+    app_module = load_app(os.getenv("DATABASE_URL"))
+    app = app_module.app
+    options = app.config["SQLALCHEMY_ENGINE_OPTIONS"]
+    limit = options.get("pool_size", 1) + options.get("max_overflow", 0)
+    client = app.test_client()
+    ids = count()
+
+    with app.app_context():
+        engine = app_module.db.engine
+
+    connects = [0]
+
+    @event.listens_for(engine, "connect")
+    def on_connect(dbapi_connection, record):
+        connects[0] += 1
+
+    print(f"pool options: {options}")
+    print(f"{'threads':>7} {'req/s':>8} {'new connections':>16} {'errors':>7}")
+    for threads in (1, 4, 8):
+        before = connects[0]
+        rps, errors = serve(client, ids, requests, threads)
+        print(f"{threads:>7} {rps:>8.0f} {connects[0] - before:>16} {errors:>7}")
+
+    unpooled = create_engine(engine.url, poolclass=NullPool)
+    print(f"pooled checkout:   {checkout_cost(engine):.3f} ms")
+    print(f"new connection:    {checkout_cost(unpooled):.3f} ms")
+    unpooled.dispose()
+
+    print(f"pooled engine opened {connects[0]} connections for {requests * 3} requests (limit {limit})")
+    return 0 if connects[0] <= limit else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000))
@@ -0,0 +1,43 @@
+"""
+Compare rows/sec of POST /contact (one row per request) against
+POST /contact/bulk (JSON array and NDJSON).
+
+    python benchmarks/bench_ingest.py [ROWS]
+"""
+import json
+import sys
+import time
+
+from common import ADMIN_TOKEN, load_app, submission
+
+
+def main(rows):
+    app_module = load_app()
+    client = app_module.app.test_client()
+    headers = {"Authorization": f"Bearer {ADMIN_TOKEN}"}
+
+    single_rows = min(rows, 2000)
+    start = time.perf_counter()
+    for i in range(single_rows):
+        client.post("/contact", json=submission(i))
+    single = single_rows / (time.perf_counter() - start)
+
+    body = json.dumps([submission(i) for i in range(rows)])
+    start = time.perf_counter()
+    response = client.post("/contact/bulk", data=body, content_type="application/json", headers=headers)
+    summary = json.loads(response.get_data(as_text=True).splitlines()[-1])["summary"]
+    bulk_array = summary["created"] / (time.perf_counter() - start)
+
+    body = "\n".join(json.dumps(submission(i)) for i in range(rows))
+    start = time.perf_counter()
+    response = client.post("/contact/bulk", data=body, content_type="application/x-ndjson", headers=headers)
+    summary = json.loads(response.get_data(as_text=True).splitlines()[-1])["summary"]
+    bulk_ndjson = summary["created"] / (time.perf_counter() - start)
+
+    print(f"single-row /contact ({single_rows} rows): {single:10.0f} rows/sec")
+    print(f"bulk JSON array     ({rows} rows): {bulk_array:10.0f} rows/sec  ({bulk_array / single:.1f}x)")
+    print(f"bulk NDJSON         ({rows} rows): {bulk_ndjson:10.0f} rows/sec  ({bulk_ndjson / single:.1f}x)")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50000)
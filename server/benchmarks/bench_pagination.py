@@ -0,0 +1,94 @@
+"""
+Show that /admin/submissions latency does not grow with page depth.
+
+Seeds ROWS submissions (default one million) into a throwaway SQLite
+database, then times fetching a page at increasing depths through the
+keyset cursor, alongside the equivalent OFFSET query for comparison.
+Exits non-zero if the deepest keyset page is more than MAX_RATIO times
+slower than the first one.
+
+    python benchmarks/bench_pagination.py [ROWS]
+"""
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert
+
+from common import ADMIN_TOKEN, load_app
+from pagination import encode_cursor
+
+PAGE_SIZE = 50
+REPEATS = 20
+MAX_RATIO = 3.0
+
+
+def seed(app_module, rows, batch_size=50000):
+    model = app_module.ContactSubmission
+    start = datetime(2024, 1, 1)
+
+    with app_module.app.app_context():
+        session = app_module.db.session
+        for offset in range(0, rows, batch_size):
+            session.execute(insert(model.__table__), [
+                {
+                    "name": f"Lead {i}",
+                    "email": f"lead{i % 5000}@example.com",
+                    "phone": "0700000000",
+                    "subject": f"Subject {i % 100}",
+                    "message": "Seeded message",
+                    # A few rows share a timestamp so the id tie-breaker matters
+                    "created_at": start + timedelta(seconds=i // 3),
+                }
+                for i in range(offset, min(offset + batch_size, rows))
+            ])
+            session.commit()
+
+
+def timed(fn):
+    samples = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main(rows):
+    app_module = load_app()
+    model = app_module.ContactSubmission
+    client = app_module.app.test_client()
+    headers = {"Authorization": f"Bearer {ADMIN_TOKEN}"}
+
+    print(f"Seeding {rows} rows...")
+    seed(app_module, rows)
+
+    depths = sorted({d for d in (0, 1000, 10000, 100000, rows // 2, rows - PAGE_SIZE) if 0 <= d < rows})
+    results = []
+
+    with app_module.app.app_context():
+        ordered = model.query.order_by(model.created_at.desc(), model.id.desc())
+
+        for depth in depths:
+            cursor = None
+            if depth:
+                anchor = ordered.offset(depth - 1).first()
+                cursor = encode_cursor(anchor.created_at, anchor.id)
+
+            url = f"/admin/submissions?limit={PAGE_SIZE}" + (f"&cursor={cursor}" if cursor else "")
+            keyset_ms = timed(lambda: client.get(url, headers=headers))
+            offset_ms = timed(lambda: ordered.offset(depth).limit(PAGE_SIZE).all())
+            results.append((depth, keyset_ms, offset_ms))
+
+    print(f"{'depth':>10} {'keyset ms':>10} {'offset ms':>10}")
+    for depth, keyset_ms, offset_ms in results:
+        print(f"{depth:>10} {keyset_ms:>10.2f} {offset_ms:>10.2f}")
+
+    ratio = results[-1][1] / results[0][1]
+    print(f"deepest/first keyset latency: {ratio:.2f}x (limit {MAX_RATIO}x)")
+    return 0 if ratio <= MAX_RATIO else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000000))
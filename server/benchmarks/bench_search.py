@@ -0,0 +1,88 @@
+"""
+Compare /admin/submissions/search against a naive ILIKE '%term%' scan.
+
+Seeds ROWS submissions built from a small vocabulary plus a few rare
+marker words, then times both approaches for common and rare queries.
+
+    python benchmarks/bench_search.py [ROWS]
+"""
+import random
+import statistics
+import sys
+import time
+
+from sqlalchemy import and_, insert
+
+from common import ADMIN_TOKEN, load_app
+
+VOCABULARY = (
+    "website redesign mobile app branding logo quote budget timeline "
+    "marketing campaign ecommerce store hosting maintenance seo content "
+    "photography video launch partnership enquiry consultation support"
+).split()
+COMPANIES = ["acme", "globex", "initech", "umbrella", "hooli", "vandelay"]
+REPEATS = 10
+
+
+def seed(app_module, rows, batch_size=20000):
+    rng = random.Random(42)
+    model = app_module.ContactSubmission
+
+    with app_module.app.app_context():
+        for offset in range(0, rows, batch_size):
+            batch = []
+            for i in range(offset, min(offset + batch_size, rows)):
+                words = rng.choices(VOCABULARY, k=30)
+                if i % 1000 == 0:
+                    words.append(rng.choice(COMPANIES))
+                batch.append({
+                    "name": f"Lead {i}",
+                    "email": f"lead{i}@example.com",
+                    "phone": "0700000000",
+                    "subject": " ".join(rng.choices(VOCABULARY, k=3)),
+                    "message": " ".join(words),
+                })
+            app_module.db.session.execute(insert(model.__table__), batch)
+            app_module.db.session.commit()
+
+
+def timed(fn):
+    samples = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main(rows):
+    app_module = load_app()
+    model = app_module.ContactSubmission
+    client = app_module.app.test_client()
+    headers = {"Authorization": f"Bearer {ADMIN_TOKEN}"}
+
+    print(f"Seeding {rows} rows...")
+    seed(app_module, rows)
+
+    start = time.perf_counter()
+    client.get("/admin/submissions/search?q=warmup", headers=headers)
+    print(f"Initial index build: {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    def like_scan(query):
+        conditions = [
+            model.subject.ilike(f"%{term}%") | model.message.ilike(f"%{term}%")
+            for term in query.split()
+        ]
+        return model.query.filter(and_(*conditions)).order_by(model.id.desc()).limit(20).all()
+
+    print(f"{'query':<24} {'index ms':>10} {'ILIKE ms':>10}")
+    with app_module.app.app_context():
+        for query in ("acme", "globex launch", "website redesign", "seo budget timeline"):
+            url = f"/admin/submissions/search?q={query}"
+            index_ms = timed(lambda: client.get(url, headers=headers))
+            like_ms = timed(lambda: like_scan(query))
+            print(f"{query:<24} {index_ms:>10.2f} {like_ms:>10.2f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200000)
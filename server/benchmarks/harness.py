@@ -0,0 +1,258 @@
+"""
+Load-test and regression harness for POST /contact.
+
+Runs entirely offline: the app is started in a subprocess against a
+throwaway SQLite database and an in-process fake SMTP sink, then driven
+with a realistic submission mix at increasing concurrency:
+
+  * ~85% new submissions with message sizes from a short note to ~2 KB
+  * ~10% double-clicks re-sending a recent payload (dedupe path)
+  * ~5% incomplete forms rejected with 400
+
+For every level it reports throughput, p50/p95/p99 latency and the RSS of
+each worker process. Results can be saved as a baseline and later runs
+compared against it:
+
+    python benchmarks/harness.py --save-baseline benchmarks/baseline.json
+    python benchmarks/harness.py --baseline benchmarks/baseline.json --threshold 0.2
+
+The comparison exits non-zero when throughput drops, or p95/p99 latency
+or worker memory grows, by more than the threshold at any level, or when
+a level has no successful requests to measure. Baselines
+are machine-specific; record one on the machine that runs the comparison.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import random
+import sys
+import time
+
+from common import load_app, submission
+from fake_smtp import FakeSMTPSink
+from load_test import free_port, percentile, post_contact, start_server
+
+EXPECTED_STATUS = {"new": 200, "duplicate": 200, "invalid": 400}
+LEVEL_METRICS = ["throughput_rps", "p95_ms", "p99_ms", "worker_rss_mb"]
+
+
+# ---------------------------------------
+# WORKLOAD
+# ---------------------------------------
+def workload(total, seed, start_id):
+    """Yield (kind, payload) pairs for one concurrency level."""
+    rng = random.Random(seed)
+    recent = []
+
+    for i in range(start_id, start_id + total):
+        roll = rng.random()
+        if roll < 0.10 and recent:
+            yield "duplicate", rng.choice(recent)
+            continue
+        if roll < 0.15:
+            payload = submission(i)
+            del payload[rng.choice(["email", "phone", "subject", "message"])]
+            yield "invalid", payload
+            continue
+
+        payload = submission(i)
+        payload["message"] = ("We would like a quote for our project. " * rng.randint(1, 50))[:2000]
+        recent = (recent + [payload])[-20:]
+        yield "new", payload
+
+
+async def run_level(port, requests, concurrency):
+    queue = asyncio.Queue()
+    for item in requests:
+        queue.put_nowait(item)
+
+    latencies, errors = [], 0
+
+    async def worker():
+        nonlocal errors
+        while not queue.empty():
+            kind, payload = queue.get_nowait()
+            try:
+                status, elapsed = await post_contact(port, payload)
+            except OSError:
+                errors += 1
+                continue
+            if status == EXPECTED_STATUS[kind]:
+                latencies.append(elapsed)
+            else:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, errors, time.perf_counter() - start
+
+
+# ---------------------------------------
+# MEMORY
+# ---------------------------------------
+def rss_mb(pid):
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def worker_pids(pid):
+    """Worker processes of a pre-fork server, or the server itself."""
+    children = []
+    for task in os.listdir(f"/proc/{pid}/task"):
+        with open(f"/proc/{pid}/task/{task}/children") as f:
+            children.extend(int(child) for child in f.read().split())
+    return children or [pid]
+
+
+# ---------------------------------------
+# RUN / COMPARE
+# ---------------------------------------
+def run(mode, levels, requests_per_level, seed):
+    sink = FakeSMTPSink().start()
+    load_app(MAIL_PORT=sink.port)
+
+    port = free_port()
+    env = dict(os.environ, OUTBOX_DISPATCHER="asyncio" if mode == "async" else "thread")
+    process = start_server(mode, port, env)
+
+    results = []
+    next_id = 0
+    try:
+        # Warm up imports, connection pools and the SMTP connection
+        warmup = list(workload(50, seed, 10 ** 9))
+        asyncio.run(run_level(port, warmup, 4))
+
+        for concurrency in levels:
+            requests = list(workload(requests_per_level, seed + concurrency, next_id))
+            next_id += requests_per_level
+
+            latencies, errors, duration = asyncio.run(run_level(port, requests, concurrency))
+            memory = [rss_mb(pid) for pid in worker_pids(process.pid)]
+
+            results.append({
+                "concurrency": concurrency,
+                "requests": len(requests),
+                "errors": errors,
+                "successful": len(latencies),
+                "throughput_rps": round(len(latencies) / duration, 2),
+                "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+                "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+                "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+                "worker_rss_mb": round(max(memory), 1),
+            })
+    finally:
+        process.terminate()
+        process.wait()
+        sink.stop()
+
+    return {
+        "mode": mode,
+        "seed": seed,
+        "requests_per_level": requests_per_level,
+        "machine": platform.node(),
+        "python": platform.python_version(),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "levels": results,
+    }
+
+
+def compare(current, baseline, threshold):
+    """Return a list of human-readable regressions beyond `threshold`."""
+    regressions = []
+    previous = {level["concurrency"]: level for level in baseline["levels"]}
+
+    for level in current["levels"]:
+        before = previous.get(level["concurrency"])
+        if before is None:
+            continue
+
+        # With no successful requests the latencies are NaN, which compares
+        # false against anything and would otherwise pass every check below
+        if level.get("successful", 1) == 0:
+            regressions.append(f"concurrency {level['concurrency']}: no successful requests")
+            continue
+        unmeasured = [
+            metric for metric in LEVEL_METRICS
+            if math.isnan(level[metric]) or math.isnan(before[metric])
+        ]
+        if unmeasured:
+            regressions.extend(
+                f"concurrency {level['concurrency']}: {metric} {before[metric]} -> {level[metric]}"
+                for metric in unmeasured
+            )
+            continue
+
+        checks = [
+            ("throughput_rps", level["throughput_rps"] < before["throughput_rps"] * (1 - threshold)),
+            ("p95_ms", level["p95_ms"] > before["p95_ms"] * (1 + threshold)),
+            ("p99_ms", level["p99_ms"] > before["p99_ms"] * (1 + threshold)),
+            ("worker_rss_mb", level["worker_rss_mb"] > before["worker_rss_mb"] * (1 + threshold)),
+        ]
+        for metric, regressed in checks:
+            if regressed:
+                regressions.append(
+                    f"concurrency {level['concurrency']}: {metric} {before[metric]} -> {level[metric]}"
+                )
+        if level["errors"] > before["errors"]:
+            regressions.append(
+                f"concurrency {level['concurrency']}: errors {before['errors']} -> {level['errors']}"
+            )
+
+    return regressions
+
+
+def print_report(report):
+    print(f"mode={report['mode']} requests/level={report['requests_per_level']}")
+    print(f"{'conc':>5} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'rss MB':>8} {'errors':>7}")
+    for level in report["levels"]:
+        print(f"{level['concurrency']:>5} {level['throughput_rps']:>9.1f} {level['p50_ms']:>8.1f} "
+              f"{level['p95_ms']:>8.1f} {level['p99_ms']:>8.1f} {level['worker_rss_mb']:>8.1f} {level['errors']:>7}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=["sync", "async"], default="sync")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--requests", type=int, default=500, help="requests per concurrency level")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--save-baseline", metavar="PATH", help="write this run's results to PATH")
+    parser.add_argument("--baseline", metavar="PATH", help="compare this run against a saved baseline")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="allowed relative regression before failing (default 0.2 = 20%%)")
+    parser.add_argument("--output", metavar="PATH", help="also write this run's results to PATH")
+    args = parser.parse_args()
+
+    report = run(args.mode, args.concurrency, args.requests, args.seed)
+    print_report(report)
+
+    for path in filter(None, (args.save_baseline, args.output)):
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"results written to {path}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get("mode") != report["mode"]:
+            print(f"baseline was recorded in {baseline.get('mode')} mode, not {report['mode']}")
+            return 2
+
+        regressions = compare(report, baseline, args.threshold)
+        if regressions:
+            print(f"REGRESSIONS beyond {args.threshold:.0%}:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print(f"no regressions beyond {args.threshold:.0%} against {args.baseline}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
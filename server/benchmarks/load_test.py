@@ -0,0 +1,157 @@
+"""
+Compare requests/sec and latency of the sync (WSGI) and async (ASGI) modes.
+
+Starts each server in a subprocess against a throwaway SQLite database and
+an in-process fake SMTP sink, then fires POST /contact requests at several
+concurrency levels from an asyncio client.
+
+The sync server is a single gunicorn sync worker when gunicorn is
+installed, otherwise a single-threaded Werkzeug server; the async server is
+a single uvicorn worker running asgi:application.
+
+    python benchmarks/load_test.py [--requests 2000] [--concurrency 1 16 64 256]
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from itertools import count
+
+from common import SERVER_DIR, load_app, submission
+from fake_smtp import FakeSMTPSink
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def server_command(mode, port):
+    if mode == "async":
+        return [sys.executable, "-m", "uvicorn", "asgi:application",
+                "--host", "127.0.0.1", "--port", str(port), "--workers", "1", "--log-level", "warning"]
+    try:
+        import gunicorn  # noqa: F401
+        return [sys.executable, "-m", "gunicorn", "app:app",
+                "--bind", f"127.0.0.1:{port}", "--workers", "1", "--log-level", "warning"]
+    except ImportError:
+        return [sys.executable, "-c",
+                "import logging; logging.getLogger('werkzeug').setLevel(logging.ERROR); "
+                "from werkzeug.serving import make_server; from app import app; "
+                f"make_server('127.0.0.1', {port}, app, threaded=False).serve_forever()"]
+
+
+def start_server(mode, port, env):
+    process = subprocess.Popen(server_command(mode, port), cwd=SERVER_DIR, env=env,
+                               stdout=subprocess.DEVNULL)
+    deadline = time.monotonic() + 15
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return process
+        except OSError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError(f"{mode} server did not start on port {port}")
+
+
+async def post_contact(port, payload):
+    body = json.dumps(payload).encode()
+    request = (
+        f"POST /contact HTTP/1.1\r\nHost: 127.0.0.1:{port}\r\n"
+        f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n"
+        "Connection: close\r\n\r\n"
+    ).encode() + body
+
+    start = time.perf_counter()
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    try:
+        writer.write(request)
+        await writer.drain()
+        status_line = await reader.readline()
+        await reader.read()
+    finally:
+        writer.close()
+    elapsed = time.perf_counter() - start
+    return int(status_line.split()[1]), elapsed
+
+
+# Unique payloads across levels and modes, so none hit the dedupe window
+_ids = count()
+
+
+async def run_level(port, total, concurrency):
+    queue = asyncio.Queue()
+    for _ in range(total):
+        queue.put_nowait(next(_ids))
+
+    latencies, errors = [], 0
+
+    async def worker():
+        nonlocal errors
+        while True:
+            try:
+                i = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            try:
+                status, elapsed = await post_contact(port, submission(i))
+            except OSError:
+                status, elapsed = None, 0
+            if status == 200:
+                latencies.append(elapsed)
+            else:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    duration = time.perf_counter() - start
+    return latencies, errors, duration
+
+
+def percentile(values, pct):
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 16, 64, 256])
+    parser.add_argument("--modes", nargs="+", default=["sync", "async"], choices=["sync", "async"])
+    args = parser.parse_args()
+
+    sink = FakeSMTPSink().start()
+    load_app(MAIL_PORT=sink.port)
+
+    print(f"{'mode':<6} {'conc':>5} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for mode in args.modes:
+        port = free_port()
+        env = dict(os.environ, OUTBOX_DISPATCHER="asyncio" if mode == "async" else "thread")
+        process = start_server(mode, port, env)
+        try:
+            for concurrency in args.concurrency:
+                latencies, errors, duration = asyncio.run(run_level(port, args.requests, concurrency))
+                print(f"{mode:<6} {concurrency:>5} {len(latencies) / duration:>9.0f} "
+                      f"{statistics.median(latencies) * 1000 if latencies else float('nan'):>8.1f} "
+                      f"{percentile(latencies, 99) * 1000:>8.1f} {errors:>7}")
+        finally:
+            # Give the outbox a moment to flush before shutting down
+            time.sleep(2)
+            process.terminate()
+            process.wait()
+
+    print(f"notification emails delivered to the fake SMTP sink: {len(sink.messages)}")
+    sink.stop()
+
+
+if __name__ == "__main__":
+    main()
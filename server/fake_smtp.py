@@ -0,0 +1,168 @@
+"""
+Local SMTP sink for development and tests.
+
+Accepts mail on localhost without delivering it anywhere and keeps every
+message it receives in memory, so the outbox dispatcher can be exercised
+without a real mail server. It can also be told to reject the next N
+messages to check retry behaviour.
+
+Usage:
+    python fake_smtp.py            # listens on 127.0.0.1:1025
+
+or from Python:
+    sink = FakeSMTPSink()
+    sink.start()
+    ...
+    sink.messages   # list of received messages
+    sink.stop()
+"""
+import socketserver
+import threading
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+
+    def reply(self, line):
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        sink = self.server.sink
+        sink.connections += 1
+        self.reply("220 fake-smtp ready")
+
+        mail_from, rcpt_to = None, []
+
+        while True:
+            raw = self.rfile.readline()
+            if not raw:
+                return
+
+            line = raw.decode(errors="replace").rstrip("\r\n")
+            command = line[:4].upper()
+
+            if command in ("HELO", "EHLO"):
+                self.wfile.write(b"250-fake-smtp\r\n")
+                self.reply("250 AUTH PLAIN LOGIN")
+            elif command == "AUTH":
+                self.reply("235 Authentication successful")
+            elif command == "MAIL":
+                mail_from, rcpt_to = line[10:].strip(" <>"), []
+                self.reply("250 OK")
+            elif command == "RCPT":
+                rcpt_to.append(line[8:].strip(" <>"))
+                self.reply("250 OK")
+            elif command == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                lines = []
+                while True:
+                    data_line = self.rfile.readline()
+                    if not data_line or data_line in (b".\r\n", b".\n"):
+                        break
+                    if data_line.startswith(b".."):
+                        data_line = data_line[1:]
+                    lines.append(data_line)
+
+                if sink.take_failure():
+                    self.reply("451 Temporary failure, try again later")
+                else:
+                    sink.record(mail_from, rcpt_to, b"".join(lines))
+                    self.reply("250 OK: queued")
+            elif command == "RSET":
+                mail_from, rcpt_to = None, []
+                self.reply("250 OK")
+            elif command == "NOOP":
+                self.reply("250 OK")
+            elif command == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("502 Command not implemented")
+
+
+class _ThreadingSMTPServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+class FakeSMTPSink:
+    """In-memory SMTP server running on a background thread."""
+
+    def __init__(self, host="127.0.0.1", port=0):
+        self._server = _ThreadingSMTPServer((host, port), _SMTPHandler)
+        self._server.sink = self
+        self._thread = None
+        self._lock = threading.Lock()
+        self._received = threading.Condition(self._lock)
+        self._failures = 0
+
+        self.messages = []
+        self.connections = 0
+
+    @property
+    def host(self):
+        return self._server.server_address[0]
+
+    @property
+    def port(self):
+        return self._server.server_address[1]
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def fail_next(self, count=1):
+        """Reject the next `count` messages with a temporary 451 error."""
+        with self._lock:
+            self._failures += count
+
+    def take_failure(self):
+        with self._lock:
+            if self._failures > 0:
+                self._failures -= 1
+                return True
+            return False
+
+    def record(self, mail_from, rcpt_to, data):
+        with self._received:
+            self.messages.append({
+                "from": mail_from,
+                "to": list(rcpt_to),
+                "data": data.decode(errors="replace"),
+            })
+            self._received.notify_all()
+
+    def wait_for(self, count, timeout=5.0):
+        """Block until at least `count` messages arrived; return True on success."""
+        with self._received:
+            return self._received.wait_for(lambda: len(self.messages) >= count, timeout)
+
+    def clear(self):
+        with self._lock:
+            self.messages.clear()
+            self.connections = 0
+            self._failures = 0
+
+
+if __name__ == "__main__":
+    import os
+    import time
+
+    sink = FakeSMTPSink(port=int(os.getenv("FAKE_SMTP_PORT", 1025))).start()
+    print(f"Fake SMTP sink listening on {sink.host}:{sink.port}")
+
+    seen = 0
+    try:
+        while True:
+            time.sleep(0.5)
+            while seen < len(sink.messages):
+                msg = sink.messages[seen]
+                print(f"--- message {seen + 1} from {msg['from']} to {', '.join(msg['to'])}")
+                print(msg["data"])
+                seen += 1
+    except KeyboardInterrupt:
+        sink.stop()
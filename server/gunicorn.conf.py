@@ -0,0 +1,54 @@
+"""
+Gunicorn settings for the contact backend.
+
+    gunicorn app:app
+
+Each worker process owns its own SQLAlchemy pool (DB_POOL_SIZE +
+DB_MAX_OVERFLOW connections). By default app.py sizes it from
+GUNICORN_THREADS, one connection per request thread plus one for the
+outbox thread, so set the thread count with GUNICORN_THREADS, not --threads.
+"""
+import os
+import sys
+import tempfile
+
+bind = f"0.0.0.0:{os.getenv('PORT', 5000)}"
+workers = int(os.getenv("WEB_CONCURRENCY", 2))
+threads = int(os.getenv("GUNICORN_THREADS", 1))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 30))
+preload_app = os.getenv("GUNICORN_PRELOAD", "False") == "True"
+
+# Workers answer /metrics on one port, so they pool their values in a shared
+# directory (see metrics.py). Workers inherit this through the environment.
+if not os.getenv("METRICS_MULTIPROC_DIR"):
+    os.environ["METRICS_MULTIPROC_DIR"] = tempfile.mkdtemp(prefix="contact-metrics-")
+
+
+def on_starting(server):
+    from metrics import snapshot_files
+
+    # Snapshots from a previous deployment would be counted as exited workers
+    for path, _ in list(snapshot_files(os.environ["METRICS_MULTIPROC_DIR"])):
+        os.remove(path)
+
+
+def post_fork(server, worker):
+    # Only a preloaded master has imported the app and holds anything to drop
+    if "app" not in sys.modules:
+        return
+
+    from app import app, mail_transport
+    from models import db
+
+    # Connections inherited from the master must not be shared between
+    # workers; drop them without closing or QUITting the parent's sockets
+    with app.app_context():
+        db.engine.dispose(close=False)
+    mail_transport.pool.reset()
+
+
+def post_worker_init(worker):
+    # Drain the outbox straight away rather than on the first request
+    from app import start_background_work
+
+    start_background_work()
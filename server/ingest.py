@@ -0,0 +1,244 @@
+"""
+Bulk ingestion of contact submissions.
+
+Used by POST /contact/bulk to import leads from partner forms or replay a
+backup. The request body is either a JSON array of submission objects or
+an NDJSON stream (one object per line). Records are parsed incrementally,
+validated one by one and written with batched executemany inserts, so
+memory stays flat no matter how many rows are uploaded.
+
+Bulk imports are stored only; they do not queue admin notification emails.
+"""
+import codecs
+import json
+
+from sqlalchemy import insert
+
+
+FIELDS = ("name", "email", "phone", "subject", "message")
+
+NDJSON_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonlines")
+
+NUMBER_CHARS = frozenset("0123456789+-.eE")
+
+# Largest single record we are willing to buffer while parsing
+MAX_RECORD_BYTES = 1024 * 1024
+
+
+class IngestError(ValueError):
+    """The upload as a whole could not be parsed."""
+
+
+# ---------------------------------------
+# PARSING
+# ---------------------------------------
+def iter_lines(stream, chunk_size=64 * 1024):
+    # Reading in chunks is much faster than readline() on WSGI input streams
+    buffer = b""
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        lines = (buffer + chunk).split(b"\n")
+        buffer = lines.pop()
+        yield from lines
+        if len(buffer) > MAX_RECORD_BYTES:
+            raise IngestError(f"Line larger than {MAX_RECORD_BYTES} bytes")
+    if buffer:
+        yield buffer
+
+
+def iter_ndjson(stream):
+    for line_no, line in enumerate(iter_lines(stream), 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError as e:
+            yield IngestError(f"Invalid JSON on line {line_no}: {e}")
+
+
+def iter_json_array(stream, chunk_size=64 * 1024):
+    """
+    Return an iterator over the elements of a top-level JSON array without
+    loading it whole. A body that is not an array at all raises IngestError
+    here, before any element is read, so it can be rejected up front.
+    """
+    decoder = json.JSONDecoder()
+    text = codecs.getincrementaldecoder("utf-8")()
+    buffer, pos, eof = "", 0, False
+
+    def fill():
+        nonlocal buffer, pos, eof
+        if eof:
+            return False
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            eof = True
+            buffer = buffer[pos:] + text.decode(b"", final=True)
+        else:
+            buffer = buffer[pos:] + text.decode(chunk)
+        pos = 0
+        return True
+
+    def skip_whitespace():
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos] in " \t\r\n":
+                pos += 1
+            if pos < len(buffer) or not fill():
+                return pos < len(buffer)
+
+    if not skip_whitespace() or buffer[pos] != "[":
+        raise IngestError("Expected a JSON array of submissions")
+    pos += 1
+
+    def elements():
+        nonlocal pos
+        expect_value, after_comma = True, False
+        while True:
+            if not skip_whitespace():
+                raise IngestError("Unterminated JSON array")
+
+            char = buffer[pos]
+            if char == "]":
+                if after_comma:
+                    raise IngestError("Trailing ',' in JSON array")
+                pos += 1
+                if skip_whitespace():
+                    raise IngestError("Unexpected data after JSON array")
+                return
+            if char == ",":
+                if expect_value:
+                    raise IngestError("Unexpected ',' in JSON array")
+                pos += 1
+                expect_value, after_comma = True, True
+                continue
+            if not expect_value:
+                raise IngestError("Expected ',' between array elements")
+
+            try:
+                value, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if len(buffer) - pos > MAX_RECORD_BYTES:
+                    raise IngestError(f"Record larger than {MAX_RECORD_BYTES} bytes")
+                if not fill():
+                    raise IngestError("Invalid JSON in array")
+                continue
+
+            # A value that runs to the end of the buffer may have been cut short,
+            # including a number whose remaining digits ("-5" of "-5.0e3") are
+            # still to come
+            tail = end
+            if type(value) in (int, float):
+                while tail < len(buffer) and buffer[tail] in NUMBER_CHARS:
+                    tail += 1
+            if tail == len(buffer) and fill():
+                continue
+
+            yield value
+            pos = end
+            expect_value, after_comma = False, False
+
+    return elements()
+
+
+def iter_records(stream, content_type):
+    mimetype = (content_type or "").split(";")[0].strip().lower()
+    if mimetype in NDJSON_TYPES:
+        return iter_ndjson(stream)
+    return iter_json_array(stream)
+
+
+# ---------------------------------------
+# VALIDATION
+# ---------------------------------------
+def validate_record(record, model):
+    """Return (row, errors) for one uploaded record."""
+    if isinstance(record, IngestError):
+        return None, {"record": str(record)}
+    if not isinstance(record, dict):
+        return None, {"record": "Expected a JSON object"}
+
+    columns = model.__table__.columns
+    row, errors = {}, {}
+
+    for field in FIELDS:
+        value = record.get(field)
+        if value is None or (isinstance(value, str) and not value.strip()):
+            errors[field] = "Required"
+            continue
+        if not isinstance(value, str):
+            errors[field] = "Must be a string"
+            continue
+
+        max_length = getattr(columns[field].type, "length", None)
+        if max_length and len(value) > max_length:
+            errors[field] = f"Must be at most {max_length} characters"
+            continue
+
+        row[field] = value.strip()
+
+    if "email" in row and "@" not in row["email"]:
+        errors["email"] = "Invalid email address"
+
+    return (None, errors) if errors else (row, None)
+
+
+# ---------------------------------------
+# INSERTING
+# ---------------------------------------
+def ingest(records, session, model, batch_size=1000):
+    """
+    Validate and insert `records`, yielding one result dict per record.
+
+    Results are emitted after the batch containing the record has been
+    committed, followed by a final {"summary": ...} entry. A batch that
+    fails to insert is rolled back and all of its rows are reported as
+    failed; earlier batches stay committed.
+    """
+    table = model.__table__
+    totals = {"received": 0, "created": 0, "invalid": 0, "failed": 0}
+    rows, pending = [], []
+
+    def flush():
+        if rows:
+            try:
+                session.execute(insert(table), rows)
+                session.commit()
+            except Exception as e:
+                session.rollback()
+                for result in pending:
+                    if result["status"] == "created":
+                        result["status"] = "failed"
+                        result["error"] = str(e)
+                        totals["created"] -= 1
+                        totals["failed"] += 1
+        results = list(pending)
+        rows.clear()
+        pending.clear()
+        return results
+
+    try:
+        for index, record in enumerate(records):
+            totals["received"] += 1
+            row, errors = validate_record(record, model)
+
+            if errors:
+                totals["invalid"] += 1
+                pending.append({"index": index, "status": "invalid", "errors": errors})
+            else:
+                totals["created"] += 1
+                rows.append(row)
+                pending.append({"index": index, "status": "created"})
+
+            if len(rows) >= batch_size or len(pending) >= batch_size * 4:
+                yield from flush()
+    except IngestError as e:
+        yield from flush()
+        yield {"error": str(e)}
+    else:
+        yield from flush()
+
+    yield {"summary": totals}
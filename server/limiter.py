@@ -0,0 +1,245 @@
+"""
+Rate limiting and duplicate-submission suppression for POST /contact.
+
+Each submission is checked against:
+  * a content-hash dedupe window - an identical payload seen within
+    `dedupe_window` seconds is acknowledged without writing or mailing again
+  * a token bucket per client IP
+  * a token bucket per email address
+
+State lives in a store. MemoryStore keeps it in an in-process LRU/TTL
+cache; RedisStore shares it between workers (set RATE_LIMIT_STORAGE_URL).
+Anything implementing `take_token`, `add_if_absent` and `delete` can stand
+in for either: pass it as `create_limiter(config, store=...)`. A store
+whose calls do network I/O should set `blocking = True` so the ASGI app
+runs the limiter off the event loop.
+"""
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries also expire after `ttl` seconds."""
+
+    def __init__(self, maxsize=100000, ttl=3600.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def _get(self, key, now):
+        item = self._data.get(key)
+        if item is None:
+            return None
+        value, expires_at = item
+        if expires_at <= now:
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return item
+
+    def _set(self, key, value, expires_at):
+        self._data[key] = (value, expires_at)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._get(key, time.monotonic())
+            return default if item is None else item[0]
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            self._set(key, value, time.monotonic() + (ttl or self.ttl))
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def update(self, key, fn, ttl=None):
+        """Atomically replace the value at `key` with fn(current or None)."""
+        with self._lock:
+            now = time.monotonic()
+            item = self._get(key, now)
+            value, result = fn(None if item is None else item[0])
+            self._set(key, value, now + (ttl or self.ttl))
+            return result
+
+
+class MemoryStore:
+    """Per-process limiter state."""
+
+    blocking = False
+
+    def __init__(self, maxsize=100000):
+        self.cache = TTLCache(maxsize=maxsize)
+
+    def take_token(self, key, rate, capacity):
+        """
+        Take one token from the bucket at `key`, refilling at `rate` tokens/sec.
+
+        Returns (allowed, retry_after_seconds).
+        """
+        now = time.monotonic()
+
+        def take(bucket):
+            tokens, updated = bucket or (capacity, now)
+            tokens = min(capacity, tokens + (now - updated) * rate)
+            if tokens >= 1:
+                return (tokens - 1, now), (True, 0.0)
+            return (tokens, now), (False, (1 - tokens) / rate)
+
+        # A bucket that has been idle long enough to refill can be forgotten
+        return self.cache.update(key, take, ttl=capacity / rate)
+
+    def add_if_absent(self, key, ttl):
+        def add(existing):
+            return True, existing is None
+        return self.cache.update(key, add, ttl=ttl)
+
+    def delete(self, key):
+        self.cache.delete(key)
+
+
+class RedisStore:
+    """Limiter state shared between workers through Redis."""
+
+    TOKEN_BUCKET = """
+    local tokens = tonumber(redis.call('HGET', KEYS[1], 't') or ARGV[2])
+    local updated = tonumber(redis.call('HGET', KEYS[1], 'u') or ARGV[3])
+    local rate, capacity, now = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3])
+    tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+    local allowed = 0
+    if tokens >= 1 then
+        tokens = tokens - 1
+        allowed = 1
+    end
+    redis.call('HSET', KEYS[1], 't', tokens, 'u', now)
+    redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate))
+    return {allowed, tostring((1 - tokens) / rate)}
+    """
+
+    blocking = True
+
+    def __init__(self, url=None, prefix="contact-limiter:", client=None):
+        if client is None:
+            import redis
+
+            client = redis.Redis.from_url(url)
+
+        self.client = client
+        self.prefix = prefix
+        self._take = self.client.register_script(self.TOKEN_BUCKET)
+
+    def take_token(self, key, rate, capacity):
+        allowed, retry_after = self._take(keys=[self.prefix + key], args=[rate, capacity, time.time()])
+        return bool(allowed), 0.0 if allowed else float(retry_after)
+
+    def add_if_absent(self, key, ttl):
+        return bool(self.client.set(self.prefix + key, 1, nx=True, ex=max(1, int(ttl))))
+
+    def delete(self, key):
+        self.client.delete(self.prefix + key)
+
+
+class Decision:
+    ALLOW = "allow"
+    DUPLICATE = "duplicate"
+    RATE_LIMITED = "rate_limited"
+
+    def __init__(self, outcome, retry_after=0.0, dedupe_key=None):
+        self.outcome = outcome
+        self.retry_after = retry_after
+        self.dedupe_key = dedupe_key
+
+
+class ContactLimiter:
+
+    def __init__(self, store, ip_per_minute=10, ip_burst=10,
+                 email_per_minute=5, email_burst=5, dedupe_window=600.0):
+        self.store = store
+        self.ip_rate = ip_per_minute / 60.0
+        self.ip_burst = ip_burst
+        self.email_rate = email_per_minute / 60.0
+        self.email_burst = email_burst
+        self.dedupe_window = dedupe_window
+
+        self._lock = threading.Lock()
+        self.counters = {
+            "allowed": 0,
+            "dedupe_hits": 0,
+            "dedupe_misses": 0,
+            "rate_limited_ip": 0,
+            "rate_limited_email": 0,
+        }
+
+    def _count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    @property
+    def blocking(self):
+        """Whether check() and forget() may block on network I/O."""
+        return getattr(self.store, "blocking", True)
+
+    def stats(self):
+        with self._lock:
+            return dict(self.counters)
+
+    @staticmethod
+    def fingerprint(data):
+        fields = {key: str(data.get(key) or "").strip() for key in ("name", "email", "phone", "subject", "message")}
+        fields["email"] = fields["email"].lower()
+        raw = json.dumps(fields, sort_keys=True).encode()
+        return "dedupe:" + hashlib.sha256(raw).hexdigest()
+
+    def check(self, ip, data):
+        """Decide whether a submission from `ip` should be processed."""
+        dedupe_key = self.fingerprint(data)
+        if not self.store.add_if_absent(dedupe_key, self.dedupe_window):
+            self._count("dedupe_hits")
+            return Decision(Decision.DUPLICATE)
+        self._count("dedupe_misses")
+
+        allowed, retry_after = self.store.take_token(f"ip:{ip}", self.ip_rate, self.ip_burst)
+        if not allowed:
+            self._count("rate_limited_ip")
+            self.store.delete(dedupe_key)
+            return Decision(Decision.RATE_LIMITED, retry_after)
+
+        email = str(data.get("email") or "").strip().lower()
+        if email:
+            allowed, retry_after = self.store.take_token(f"email:{email}", self.email_rate, self.email_burst)
+            if not allowed:
+                self._count("rate_limited_email")
+                self.store.delete(dedupe_key)
+                return Decision(Decision.RATE_LIMITED, retry_after)
+
+        self._count("allowed")
+        return Decision(Decision.ALLOW, dedupe_key=dedupe_key)
+
+    def forget(self, decision):
+        """Drop the dedupe entry for a submission that failed, so a retry goes through."""
+        if decision.dedupe_key:
+            self.store.delete(decision.dedupe_key)
+
+
+def create_limiter(config, store=None):
+    if store is None:
+        url = config.get("RATE_LIMIT_STORAGE_URL")
+        store = RedisStore(url) if url else MemoryStore(maxsize=config.get("RATE_LIMIT_MAX_KEYS", 100000))
+    return ContactLimiter(
+        store,
+        ip_per_minute=config.get("RATE_LIMIT_IP_PER_MINUTE", 10),
+        ip_burst=config.get("RATE_LIMIT_IP_BURST", 10),
+        email_per_minute=config.get("RATE_LIMIT_EMAIL_PER_MINUTE", 5),
+        email_burst=config.get("RATE_LIMIT_EMAIL_BURST", 5),
+        dedupe_window=config.get("DEDUPE_WINDOW_MINUTES", 10) * 60,
+    )
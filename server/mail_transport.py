@@ -0,0 +1,218 @@
+"""
+Pooled SMTP transport on top of Flask-Mail.
+
+`mail.send` opens a fresh SMTP connection (STARTTLS + AUTH) for every
+message. MailTransport keeps a bounded pool of authenticated connections
+instead, health-checks idle ones with NOOP, recycles them after a maximum
+age or message count, and sends a whole batch over a single connection.
+"""
+import queue
+import smtplib
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import current_app
+from flask_mail import Connection
+
+
+class _PooledHost:
+    """An authenticated SMTP connection plus the bookkeeping the pool needs."""
+
+    def __init__(self, host):
+        self.host = host
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+        self.sent = 0
+
+    def close(self):
+        try:
+            self.host.quit()
+        except (smtplib.SMTPException, OSError):
+            self.host.close()
+
+
+class _PooledConnection(Connection):
+    """Flask-Mail connection that borrows its SMTP host from the pool."""
+
+    def __init__(self, state, host):
+        super().__init__(state)
+        self.host = host
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        pass
+
+
+class SMTPConnectionPool:
+    """Bounded pool of SMTP connections configured like Flask-Mail's."""
+
+    def __init__(self, state, size=4, max_age=300.0, max_messages=100,
+                 check_after=30.0, timeout=10.0):
+        self.state = state
+        self.size = size
+        self.max_age = max_age
+        self.max_messages = max_messages
+        self.check_after = check_after
+        self.timeout = timeout
+
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+
+        self.opened = 0
+        self.recycled = 0
+
+    def _open(self):
+        state = self.state
+        if state.use_ssl:
+            host = smtplib.SMTP_SSL(state.server, state.port, timeout=self.timeout)
+        else:
+            host = smtplib.SMTP(state.server, state.port, timeout=self.timeout)
+
+        host.set_debuglevel(int(state.debug))
+
+        if state.use_tls:
+            host.starttls()
+        if state.username and state.password:
+            host.login(state.username, state.password)
+
+        self.opened += 1
+        return _PooledHost(host)
+
+    def _usable(self, pooled):
+        now = time.monotonic()
+        if now - pooled.created_at > self.max_age or pooled.sent >= self.max_messages:
+            return False
+        if now - pooled.last_used > self.check_after:
+            try:
+                return pooled.host.noop()[0] == 250
+            except (smtplib.SMTPException, OSError):
+                return False
+        return True
+
+    def _checkout(self):
+        while True:
+            try:
+                pooled = self._idle.get_nowait()
+            except queue.Empty:
+                return self._open()
+
+            if self._usable(pooled):
+                return pooled
+
+            self.recycled += 1
+            pooled.close()
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection; it goes back to the pool unless it broke."""
+        if not self._slots.acquire(timeout=self.timeout):
+            raise TimeoutError("Timed out waiting for a free SMTP connection")
+
+        pooled = None
+        try:
+            pooled = self._checkout()
+            yield pooled
+        except OSError:
+            if pooled is not None:
+                pooled.close()
+                pooled = None
+            raise
+        finally:
+            if pooled is not None:
+                pooled.last_used = time.monotonic()
+                self._idle.put(pooled)
+            self._slots.release()
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+    def reset(self):
+        """
+        Forget every connection without sending QUIT, e.g. in a forked
+        worker: the sockets are the parent's, and talking on them would
+        interleave with it. Only this process's copies are closed.
+        """
+        while True:
+            try:
+                self._idle.get_nowait().host.close()
+            except queue.Empty:
+                break
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(self.size)
+
+
+class MailTransport:
+    """Drop-in replacement for `mail.send` that reuses pooled connections."""
+
+    def __init__(self, app=None, mail=None):
+        self.mail = mail
+        self.pool = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        state = app.extensions["mail"]
+        self.pool = SMTPConnectionPool(
+            state,
+            size=app.config.get("MAIL_POOL_SIZE", 4),
+            max_age=app.config.get("MAIL_POOL_MAX_AGE", 300.0),
+            max_messages=app.config.get("MAIL_POOL_MAX_MESSAGES", 100),
+            check_after=app.config.get("MAIL_POOL_CHECK_AFTER", 30.0),
+        )
+
+    def send(self, message):
+        error = self.send_batch([message])[0]
+        if error is not None:
+            raise error
+
+    def send_batch(self, messages):
+        """
+        Send `messages` over a pooled connection, moving on to another one
+        when it reaches MAIL_POOL_MAX_MESSAGES mid-batch.
+
+        Returns a list with one entry per message: None if it was accepted,
+        otherwise the exception that stopped it, so callers can retry just
+        the failures.
+        """
+        state = current_app.extensions["mail"]
+        if state.suppress:
+            for message in messages:
+                state.send(message)
+            return [None] * len(messages)
+
+        results = []
+        while len(results) < len(messages):
+            try:
+                with self.pool.connection() as pooled:
+                    connection = _PooledConnection(state, pooled.host)
+                    started = len(results)
+                    for message in messages[started:]:
+                        # Back to the pool, which recycles it; a checkout always sends one
+                        if len(results) > started and pooled.sent >= self.pool.max_messages:
+                            break
+                        try:
+                            connection.send(message)
+                        except smtplib.SMTPServerDisconnected:
+                            raise
+                        except (smtplib.SMTPResponseException, smtplib.SMTPRecipientsRefused) as e:
+                            # Rejected by the server; the connection is still usable
+                            results.append(e)
+                        except OSError:
+                            raise
+                        except Exception as e:
+                            results.append(e)
+                        else:
+                            pooled.sent += 1
+                            results.append(None)
+            except Exception as e:
+                # The connection itself failed; everything not yet sent failed with it
+                results.extend([e] * (len(messages) - len(results)))
+
+        return results
@@ -0,0 +1,429 @@
+"""
+Hot-path instrumentation for the contact backend.
+
+A small metrics registry rendered in the Prometheus text format on
+GET /metrics: per-stage timing histograms and counters for requests, DB
+and mail, plus callback gauges such as SQLAlchemy pool utilization.
+
+Several workers behind one port (gunicorn, uvicorn --workers) share a
+directory (METRICS_MULTIPROC_DIR; gunicorn.conf.py sets one up). Every
+process writes a snapshot of its values there every `flush_interval`
+seconds once `Registry.start()` is called, and whenever it serves a scrape, and a scrape sums the snapshots
+of all processes, so whichever worker answers reports the same totals
+and counters never go backwards. Snapshots of exited workers are kept
+so their counts are not lost; start each deployment with an empty
+directory.
+
+Also provides structured JSON logging that carries the current request ID
+and an opt-in sampling profiler for individual requests.
+"""
+import atexit
+import glob
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter as _Tally
+from contextlib import contextmanager
+
+from flask import g, has_request_context
+
+
+# metrics-<pid>-<token>.json; anything else in the directory is left alone
+SNAPSHOT_NAME = re.compile(r"metrics-(\d+)-[0-9a-f]+\.json")
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+# ---------------------------------------
+# METRIC TYPES
+# ---------------------------------------
+# `shared` says how values from several processes are combined:
+#   "all"  - summed over every process that ever wrote a snapshot
+#   "live" - summed over processes that are still running
+#   None   - not shared; the process serving the scrape reports its own
+class Counter:
+    type = "counter"
+    suffix = "_total"
+    shared = "all"
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.reset()
+
+    def reset(self):
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def collect(self):
+        with self._lock:
+            return dict(self._values)
+
+    @staticmethod
+    def combine(a, b):
+        return a + b
+
+    def samples(self, values):
+        for key, value in values.items():
+            yield self.name + self.suffix, _format_labels(self.labelnames, key), value
+
+
+class Histogram:
+    type = "histogram"
+    suffix = ""
+    shared = "all"
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        self.reset()
+
+    def reset(self):
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            counts, total = self._values.get(key) or ([0] * len(self.buckets), 0.0)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            self._values[key] = (counts, total + value)
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def collect(self):
+        with self._lock:
+            return {key: (list(counts), total) for key, (counts, total) in self._values.items()}
+
+    @staticmethod
+    def combine(a, b):
+        return [x + y for x, y in zip(a[0], b[0])], a[1] + b[1]
+
+    def samples(self, values):
+        for key, (counts, total) in values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, [("le", _format_value(bound))])
+                yield self.name + "_bucket", labels, cumulative
+            yield self.name + "_sum", _format_labels(self.labelnames, key), total
+            yield self.name + "_count", _format_labels(self.labelnames, key), cumulative
+
+
+class CallbackGauge:
+    """Gauge whose values are read from `callback()` at scrape time."""
+    type = "gauge"
+    suffix = ""
+
+    def __init__(self, name, help, callback, labelnames=(), shared=None):
+        self.name = name
+        self.help = help
+        self.callback = callback
+        self.labelnames = tuple(labelnames)
+        self.shared = shared
+
+    def reset(self):
+        pass
+
+    def collect(self):
+        values = self.callback()
+        if not isinstance(values, dict):
+            values = {(): values}
+        return {
+            key if isinstance(key, tuple) else (key,): value
+            for key, value in values.items() if value is not None
+        }
+
+    @staticmethod
+    def combine(a, b):
+        return a + b
+
+    def samples(self, values):
+        for key, value in values.items():
+            yield self.name + self.suffix, _format_labels(self.labelnames, key), value
+
+
+class CallbackCounter(CallbackGauge):
+    """Counter kept elsewhere (e.g. ContactLimiter.stats), read at scrape time."""
+    type = "counter"
+    suffix = "_total"
+
+    def __init__(self, name, help, callback, labelnames=()):
+        super().__init__(name, help, callback, labelnames, shared="all")
+
+
+class Registry:
+    """
+    Metrics of this process, or of every process sharing `directory`.
+    """
+
+    def __init__(self, directory=None, flush_interval=5.0):
+        self.metrics = []
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self._snapshot = None
+        self._flusher = None
+        self._lock = threading.Lock()
+
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            self._snapshot = self._snapshot_path()
+            # Forked workers start from zero and write their own snapshot
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def counter(self, name, help, labelnames=()):
+        return self.register(Counter(name, help, labelnames))
+
+    def histogram(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, help, labelnames, buckets))
+
+    def gauge(self, name, help, callback, labelnames=(), shared=None):
+        return self.register(CallbackGauge(name, help, callback, labelnames, shared))
+
+    def callback_counter(self, name, help, callback, labelnames=()):
+        return self.register(CallbackCounter(name, help, callback, labelnames))
+
+    # ---------------------------------------
+    # SNAPSHOTS
+    # ---------------------------------------
+    def _snapshot_path(self):
+        return os.path.join(self.directory, f"metrics-{os.getpid()}-{uuid.uuid4().hex[:8]}.json")
+
+    def start(self):
+        """
+        Flush this process's snapshot every `flush_interval` seconds and at
+        exit. Call it from the serving process, not at import time.
+        """
+        if not self.directory or self._flusher is not None:
+            return self
+
+        with self._lock:
+            if self._flusher is None:
+                def run():
+                    while True:
+                        time.sleep(self.flush_interval)
+                        self.flush()
+
+                self._flusher = threading.Thread(target=run, name="metrics-flusher", daemon=True)
+                self._flusher.start()
+                atexit.register(self.flush)
+        return self
+
+    def _after_fork(self):
+        for metric in self.metrics:
+            metric.reset()
+        # The parent's flusher thread does not exist in the child
+        self._snapshot = self._snapshot_path()
+        self._flusher = None
+        self._lock = threading.Lock()
+
+    def flush(self):
+        """Write this process's shared values to its snapshot file."""
+        snapshot = {}
+        for metric in self.metrics:
+            if not metric.shared:
+                continue
+            try:
+                snapshot[metric.name] = [[list(key), value] for key, value in metric.collect().items()]
+            except Exception as e:
+                logging.getLogger(__name__).warning("metric %s failed: %s", metric.name, e)
+
+        tmp = self._snapshot + ".tmp"
+        try:
+            with open(tmp, "w") as f:
+                json.dump(snapshot, f)
+            os.replace(tmp, self._snapshot)
+        except OSError as e:
+            logging.getLogger(__name__).warning("writing metrics snapshot failed: %s", e)
+
+    def _merged(self):
+        self.flush()
+        merged = {metric.name: {} for metric in self.metrics if metric.shared}
+        shared = {metric.name: metric for metric in self.metrics if metric.shared}
+
+        for path, pid in snapshot_files(self.directory):
+            live = path == self._snapshot or _alive(pid)
+            try:
+                with open(path) as f:
+                    snapshot = json.load(f)
+            except (OSError, ValueError):
+                continue
+
+            for name, items in snapshot.items():
+                metric = shared.get(name)
+                if metric is None or (metric.shared == "live" and not live):
+                    continue
+                values = merged[name]
+                for key, value in items:
+                    key = tuple(key)
+                    values[key] = metric.combine(values[key], value) if key in values else value
+
+        return merged
+
+    def render(self):
+        merged = self._merged() if self.directory else {}
+        lines = []
+        for metric in self.metrics:
+            family = metric.name + metric.suffix
+            lines.append(f"# HELP {family} {metric.help}")
+            lines.append(f"# TYPE {family} {metric.type}")
+            try:
+                values = merged[metric.name] if metric.name in merged else metric.collect()
+                for name, labels, value in metric.samples(values):
+                    lines.append(f"{name}{labels} {_format_value(value)}")
+            except Exception as e:
+                logging.getLogger(__name__).warning("metric %s failed: %s", metric.name, e)
+        return "\n".join(lines) + "\n"
+
+
+def snapshot_files(directory):
+    """(path, pid) of every metrics snapshot in `directory`."""
+    for path in glob.glob(os.path.join(directory, "metrics-*.json")):
+        match = SNAPSHOT_NAME.fullmatch(os.path.basename(path))
+        if match:
+            yield path, int(match.group(1))
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def pool_stats(engine):
+    """Utilization of a SQLAlchemy QueuePool, keyed by state."""
+    pool = engine.pool
+    stats = {}
+    for state, method in (("size", "size"), ("checked_out", "checkedout"),
+                          ("checked_in", "checkedin"), ("overflow", "overflow")):
+        if hasattr(pool, method):
+            stats[state] = getattr(pool, method)()
+    return stats
+
+
+# ---------------------------------------
+# STRUCTURED LOGGING
+# ---------------------------------------
+class RequestIdFilter(logging.Filter):
+    def filter(self, record):
+        if not hasattr(record, "request_id"):
+            record.request_id = g.get("request_id") if has_request_context() else None
+        return True
+
+
+class JSONFormatter(logging.Formatter):
+    RESERVED = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "request_id"}
+
+    def format(self, record):
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "msg": record.getMessage(),
+            "request_id": getattr(record, "request_id", None),
+        }
+        entry.update({k: v for k, v in vars(record).items() if k not in self.RESERVED})
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def configure_logging(level="INFO"):
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(JSONFormatter())
+    handler.addFilter(RequestIdFilter())
+
+    root = logging.getLogger()
+    root.handlers[:] = [handler]
+    root.setLevel(level)
+
+
+# ---------------------------------------
+# SAMPLING PROFILER
+# ---------------------------------------
+class SamplingProfiler:
+    """
+    Samples one thread's Python stack every `interval` seconds from a
+    background thread. Cheap enough to switch on for a single request.
+    """
+
+    def __init__(self, thread_id=None, interval=0.001, max_depth=40):
+        self.thread_id = thread_id or threading.get_ident()
+        self.interval = interval
+        self.max_depth = max_depth
+        self.stacks = _Tally()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None and len(stack) < self.max_depth:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({code.co_filename.rsplit('/', 1)[-1]}:{frame.f_lineno})")
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def start(self):
+        self._thread = threading.Thread(target=self._sample, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        return self
+
+    def top(self, limit=10):
+        """Most frequent stacks in collapsed (flame graph) format."""
+        return [f"{stack} {count}" for stack, count in self.stacks.most_common(limit)]
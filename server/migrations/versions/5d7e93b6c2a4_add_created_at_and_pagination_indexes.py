@@ -0,0 +1,38 @@
+"""add created_at and pagination indexes to contact_submission
+
+Revision ID: 5d7e93b6c2a4
+Revises: a1c4e2f80b31
+Create Date: 2026-10-18 11:40:02.517930
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d7e93b6c2a4'
+down_revision = 'a1c4e2f80b31'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Existing rows have no creation time; backfill them with the
+    # migration time so the column can be NOT NULL
+    with op.batch_alter_table('contact_submission', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('created_at', sa.DateTime(), nullable=False,
+                                      server_default=sa.func.current_timestamp()))
+
+    with op.batch_alter_table('contact_submission', schema=None) as batch_op:
+        batch_op.alter_column('created_at', server_default=None)
+        batch_op.create_index('ix_contact_submission_created_at_id', ['created_at', 'id'], unique=False)
+        batch_op.create_index('ix_contact_submission_email_created_at_id', ['email', 'created_at', 'id'], unique=False)
+        batch_op.create_index('ix_contact_submission_subject_created_at_id', ['subject', 'created_at', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('contact_submission', schema=None) as batch_op:
+        batch_op.drop_index('ix_contact_submission_subject_created_at_id')
+        batch_op.drop_index('ix_contact_submission_email_created_at_id')
+        batch_op.drop_index('ix_contact_submission_created_at_id')
+        batch_op.drop_column('created_at')
@@ -0,0 +1,41 @@
+"""add full-text search_vector to contact_submission
+
+Revision ID: 8b2f61d0e9c7
+Revises: 5d7e93b6c2a4
+Create Date: 2026-10-18 14:05:51.062214
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '8b2f61d0e9c7'
+down_revision = '5d7e93b6c2a4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Postgres only: a generated tsvector column is kept up to date by the
+    # database on every insert. Other databases use the in-process index
+    # in search.py instead.
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.execute("""
+        ALTER TABLE contact_submission
+        ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+            setweight(to_tsvector('english', coalesce(subject, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(message, '')), 'B')
+        ) STORED
+    """)
+    op.create_index('ix_contact_submission_search_vector', 'contact_submission',
+                    ['search_vector'], unique=False, postgresql_using='gin')
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.drop_index('ix_contact_submission_search_vector', table_name='contact_submission')
+    op.drop_column('contact_submission', 'search_vector')
@@ -0,0 +1,61 @@
+"""consolidate contact_submission into contact_submissions
+
+Revision ID: c3e8a4f19d52
+Revises: 8b2f61d0e9c7
+Create Date: 2026-10-18 17:22:37.904115
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3e8a4f19d52'
+down_revision = '8b2f61d0e9c7'
+branch_labels = None
+depends_on = None
+
+
+COLUMNS = [
+    ('name', sa.String(length=120)),
+    ('email', sa.String(length=120)),
+    ('phone', sa.String(length=50)),
+    ('subject', sa.String(length=200)),
+    ('message', sa.Text()),
+]
+
+INDEXES = [
+    ('created_at_id', ['created_at', 'id']),
+    ('email_created_at_id', ['email', 'created_at', 'id']),
+    ('subject_created_at_id', ['subject', 'created_at', 'id']),
+]
+
+
+def rename(old_table, new_table, nullable):
+    is_postgres = op.get_bind().dialect.name == 'postgresql'
+
+    op.rename_table(old_table, new_table)
+
+    for suffix, columns in INDEXES:
+        op.drop_index(f'ix_{old_table}_{suffix}', table_name=new_table)
+        op.create_index(f'ix_{new_table}_{suffix}', new_table, columns, unique=False)
+
+    if is_postgres:
+        op.execute(f'ALTER INDEX ix_{old_table}_search_vector RENAME TO ix_{new_table}_search_vector')
+
+    if not nullable:
+        # Rows stored before the NOT NULL constraint may have missing fields
+        for column, _ in COLUMNS:
+            op.execute(f"UPDATE {new_table} SET {column} = '' WHERE {column} IS NULL")
+
+    with op.batch_alter_table(new_table, schema=None) as batch_op:
+        for column, type_ in COLUMNS:
+            batch_op.alter_column(column, existing_type=type_, nullable=nullable)
+
+
+def upgrade():
+    rename('contact_submission', 'contact_submissions', nullable=False)
+
+
+def downgrade():
+    rename('contact_submissions', 'contact_submission', nullable=True)
@@ -0,0 +1,25 @@
+"""index outbox_message.created_at
+
+Revision ID: e4b9d17a6c03
+Revises: c3e8a4f19d52
+Create Date: 2026-10-18 19:41:06.527734
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'e4b9d17a6c03'
+down_revision = 'c3e8a4f19d52'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('outbox_message', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_outbox_message_created_at'), ['created_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('outbox_message', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_outbox_message_created_at'))
@@ -7,13 +7,21 @@ db = SQLAlchemy()
 class ContactSubmission(db.Model):
     __tablename__ = "contact_submissions"
 
+    # Composite indexes back keyset pagination on (created_at, id),
+    # optionally narrowed by an exact email or subject filter
+    __table_args__ = (
+        db.Index("ix_contact_submissions_created_at_id", "created_at", "id"),
+        db.Index("ix_contact_submissions_email_created_at_id", "email", "created_at", "id"),
+        db.Index("ix_contact_submissions_subject_created_at_id", "subject", "created_at", "id"),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String(100), nullable=False)
+    name = db.Column(db.String(120), nullable=False)
     email = db.Column(db.String(120), nullable=False)
-    phone = db.Column(db.String(20), nullable=False)
-    subject = db.Column(db.String(150), nullable=False)
+    phone = db.Column(db.String(50), nullable=False)
+    subject = db.Column(db.String(200), nullable=False)
     message = db.Column(db.Text, nullable=False)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
 
     def to_dict(self):
         return {
@@ -30,4 +38,21 @@ class ContactSubmission(db.Model):
     def __repr__(self):
         return f"<ContactSubmission {self.name} - {self.email}>"
 
-   
\ No newline at end of file
+
+class OutboxMessage(db.Model):
+    __tablename__ = "outbox_message"
+
+    id = db.Column(db.Integer, primary_key=True)
+    subject = db.Column(db.String(255), nullable=False)
+    recipient = db.Column(db.String(120), nullable=False)
+    reply_to = db.Column(db.String(120))
+    body = db.Column(db.Text, nullable=False)
+    status = db.Column(db.String(20), nullable=False, default="pending", index=True)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    last_error = db.Column(db.Text)
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+    sent_at = db.Column(db.DateTime)
+
+    def __repr__(self):
+        return f"<OutboxMessage {self.id} {self.status} -> {self.recipient}>"
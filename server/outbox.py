@@ -0,0 +1,282 @@
+"""
+Outbox dispatcher for contact notification emails.
+
+`contact()` only writes an `OutboxMessage` row in the same transaction as the
+submission. This module drains those rows in the background and hands them
+to the mail server in batches, retrying failed sends with exponential
+backoff. When more than `digest_threshold` messages were queued within
+`digest_window` seconds, due messages are folded into one periodic digest
+email instead of being sent one by one.
+
+Rows are claimed (status "sending") and the claim committed before anything
+is sent, so several dispatchers can share the table without sending the
+same email twice. Delivered and abandoned rows are pruned after `retention`
+seconds.
+
+The dispatcher can run inside the web process (OUTBOX_DISPATCHER=thread) or
+as a separate worker process:
+
+    python outbox.py
+"""
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+
+from flask_mail import Message
+from sqlalchemy import func, select, update
+
+
+log = logging.getLogger("outbox")
+
+# Rows in these states are never sent again and can be pruned
+FINISHED = ("sent", "digested", "failed")
+
+
+class OutboxDispatcher:
+    """Polls the outbox table and sends pending messages."""
+
+    def __init__(self, app, db, model, send_batch,
+                 batch_size=20, poll_interval=1.0,
+                 max_attempts=5, backoff_base=2.0, backoff_max=300.0,
+                 digest_threshold=0, digest_window=300.0, digest_max=500,
+                 claim_timeout=300.0, retention=7 * 86400.0, prune_interval=3600.0):
+        self.app = app
+        self.db = db
+        self.model = model
+        self.send_batch = send_batch
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.digest_threshold = digest_threshold
+        self.digest_window = digest_window
+        self.digest_max = digest_max
+        self.claim_timeout = claim_timeout
+        self.retention = retention
+        self.prune_interval = prune_interval
+
+        self._next_prune = 0.0
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    # ---------------------------------------
+    # LIFECYCLE
+    # ---------------------------------------
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return self
+        with self._lock:
+            if not (self._thread and self._thread.is_alive()):
+                self._stop.clear()
+                self._thread = threading.Thread(target=self.run_forever, name="outbox-dispatcher", daemon=True)
+                self._thread.start()
+        return self
+
+    def stop(self, timeout=5.0):
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def notify(self):
+        """Wake the dispatcher early, e.g. right after a new row is committed."""
+        self._wake.set()
+
+    def run_forever(self):
+        while not self._stop.is_set():
+            try:
+                sent = self.drain_once()
+                self.prune_if_due()
+            except Exception:
+                log.exception("outbox drain failed")
+                sent = 0
+
+            # Keep going straight away while there is a backlog
+            if sent < self.batch_size:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+
+    # ---------------------------------------
+    # DRAINING
+    # ---------------------------------------
+    def backoff(self, attempts):
+        return min(self.backoff_base ** attempts, self.backoff_max)
+
+    def claim_batch(self, limit):
+        """
+        Claim up to `limit` due rows and return them.
+
+        Each row is taken with a conditional UPDATE and the claim is committed
+        before anything is sent, so two dispatchers never send the same row,
+        even on SQLite where the SELECT takes no lock. A claim expires after
+        `claim_timeout` seconds, so rows held by a dispatcher that died
+        mid-send are picked up again.
+        """
+        model, session = self.model, self.db.session
+        now = datetime.utcnow()
+        due = (model.status.in_(("pending", "sending")), model.next_attempt_at <= now)
+
+        # SKIP LOCKED keeps concurrent dispatchers on Postgres off each other's candidates
+        candidates = session.execute(
+            select(model.id)
+            .where(*due)
+            .order_by(model.next_attempt_at, model.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        ).scalars().all()
+
+        lease = now + timedelta(seconds=self.claim_timeout)
+        claimed = [
+            row_id for row_id in candidates
+            if session.execute(
+                update(model).where(model.id == row_id, *due).values(status="sending", next_attempt_at=lease)
+            ).rowcount == 1
+        ]
+        session.commit()
+
+        if not claimed:
+            return []
+        return model.query.filter(model.id.in_(claimed)).order_by(model.id).all()
+
+    def digest_mode(self):
+        if not self.digest_threshold:
+            return False
+        since = datetime.utcnow() - timedelta(seconds=self.digest_window)
+        # Runs on every poll: an index range scan that stops past the threshold
+        recent = (
+            self.model.query
+            .filter(self.model.created_at >= since)
+            .limit(self.digest_threshold + 1)
+            .count()
+        )
+        return recent > self.digest_threshold
+
+    def drain_once(self, send_batch=None):
+        """
+        Send one batch of due messages. Returns how many were attempted.
+
+        `send_batch` overrides the transport for this call, e.g. the asyncio
+        one in asgi.py; it takes a list of messages and returns one error or
+        None per message.
+        """
+        send_batch = send_batch or self.send_batch
+        with self.app.app_context():
+            if self.digest_mode():
+                return self.send_digest(send_batch)
+
+            batch = self.claim_batch(self.batch_size)
+            if batch:
+                results = send_batch([build_message(entry) for entry in batch])
+                for entry, error in zip(batch, results):
+                    if error is None:
+                        self.mark_sent(entry)
+                    else:
+                        self.mark_failed(entry, error)
+
+            self.db.session.commit()
+            return len(batch)
+
+    def send_digest(self, send_batch):
+        """
+        Fold every due message into one email per recipient, once per window.
+
+        The last digest is read from the table rather than kept in memory, so
+        the window holds across every dispatcher sharing it, e.g. one per
+        gunicorn worker.
+        """
+        last_digest = self.db.session.execute(
+            select(func.max(self.model.sent_at)).where(self.model.status == "digested")
+        ).scalar()
+        if last_digest is not None and datetime.utcnow() - last_digest < timedelta(seconds=self.digest_window):
+            return 0
+
+        batch = self.claim_batch(self.digest_max)
+        if not batch:
+            return 0
+
+        by_recipient = {}
+        for entry in batch:
+            by_recipient.setdefault(entry.recipient, []).append(entry)
+
+        groups = list(by_recipient.values())
+        results = send_batch([build_digest(entries) for entries in groups])
+        for entries, error in zip(groups, results):
+            for entry in entries:
+                if error is None:
+                    self.mark_sent(entry, status="digested")
+                else:
+                    self.mark_failed(entry, error)
+
+        self.db.session.commit()
+        return len(batch)
+
+    def mark_sent(self, entry, status="sent"):
+        entry.status = status
+        entry.sent_at = datetime.utcnow()
+        entry.last_error = None
+
+    def mark_failed(self, entry, error):
+        entry.attempts += 1
+        entry.last_error = str(error)[:500]
+
+        if entry.attempts >= self.max_attempts:
+            entry.status = "failed"
+            log.error("giving up on outbox message", extra={
+                "outbox_id": entry.id, "attempts": entry.attempts, "error": str(error),
+            })
+        else:
+            entry.status = "pending"
+            entry.next_attempt_at = datetime.utcnow() + timedelta(seconds=self.backoff(entry.attempts))
+
+    def prune_if_due(self):
+        if self.retention and time.monotonic() >= self._next_prune:
+            self._next_prune = time.monotonic() + self.prune_interval
+            self.prune()
+
+    def prune(self):
+        """Delete finished rows older than `retention` seconds. Returns how many."""
+        cutoff = datetime.utcnow() - timedelta(seconds=self.retention)
+        with self.app.app_context():
+            deleted = (
+                self.model.query
+                .filter(self.model.status.in_(FINISHED), self.model.created_at < cutoff)
+                .delete(synchronize_session=False)
+            )
+            self.db.session.commit()
+
+        if deleted:
+            log.info("pruned outbox messages", extra={"deleted": deleted})
+        return deleted
+
+
+def build_message(entry):
+    msg = Message(subject=entry.subject, recipients=[entry.recipient])
+    msg.reply_to = entry.reply_to
+    msg.body = entry.body
+    return msg
+
+
+def build_digest(entries):
+    msg = Message(
+        subject=f"Contact Form Digest: {len(entries)} new submissions",
+        recipients=[entries[0].recipient]
+    )
+    separator = "\n" + "-" * 40 + "\n"
+    msg.body = separator.join(
+        f"Subject: {entry.subject}\nReply-To: {entry.reply_to}\n{entry.body}" for entry in entries
+    )
+    return msg
+
+
+if __name__ == "__main__":
+    from app import outbox
+
+    log.info("outbox dispatcher running, press Ctrl+C to stop")
+    try:
+        outbox.run_forever()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,190 @@
+"""
+Full-text search over submission subjects and messages.
+
+On Postgres the search runs against a generated `search_vector` tsvector
+column with a GIN index (see the add_search_vector migration), so the
+database keeps the index up to date on every insert.
+
+Other databases (SQLite in development and benchmarks) fall back to an
+in-process inverted index. It is built lazily on the first search, updated
+by `contact()` as rows are inserted, and catches up on rows written by
+other processes by scanning ids above the last one it has seen.
+"""
+import heapq
+import math
+import re
+import threading
+from collections import Counter
+
+from sqlalchemy import text
+
+
+SEARCH_COLUMN = "search_vector"
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have i if in is it of on or "
+    "our so that the their this to was we were will with you your".split()
+)
+
+
+def tokenize(value):
+    return [
+        token for token in TOKEN_RE.findall((value or "").lower())
+        if token not in STOPWORDS
+    ]
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    """Keep Alembic autogenerate from dropping the migration-managed tsvector column."""
+    return not (type_ == "column" and name == SEARCH_COLUMN)
+
+
+class InvertedIndex:
+    """Term -> {doc_id: term frequency} postings with BM25 ranking."""
+
+    def __init__(self, k1=1.2, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings = {}
+        self.lengths = {}
+        self.total_length = 0
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self.lengths)
+
+    def add(self, doc_id, *fields):
+        tokens = tokenize(" ".join(field or "" for field in fields))
+        with self._lock:
+            if doc_id in self.lengths:
+                self.remove(doc_id)
+            for term, count in Counter(tokens).items():
+                self.postings.setdefault(term, {})[doc_id] = count
+            self.lengths[doc_id] = len(tokens)
+            self.total_length += len(tokens)
+
+    def remove(self, doc_id):
+        with self._lock:
+            length = self.lengths.pop(doc_id, None)
+            if length is None:
+                return
+            self.total_length -= length
+            for term in list(self.postings):
+                docs = self.postings[term]
+                if docs.pop(doc_id, None) is not None and not docs:
+                    del self.postings[term]
+
+    def search(self, query, offset=0, limit=20):
+        """Return (total, [(doc_id, score), ...]) for docs containing every query term."""
+        terms = set(tokenize(query))
+        if not terms:
+            return 0, []
+
+        with self._lock:
+            postings = [self.postings.get(term) for term in terms]
+            if not all(postings):
+                return 0, []
+
+            postings.sort(key=len)
+            matches = set(postings[0])
+            for docs in postings[1:]:
+                matches.intersection_update(docs)
+                if not matches:
+                    return 0, []
+
+            count = len(self.lengths)
+            avg_length = (self.total_length / count) or 1
+            k1, b, lengths = self.k1, self.b, self.lengths
+            norms = {doc_id: k1 * (1 - b + b * lengths[doc_id] / avg_length) for doc_id in matches}
+            scores = dict.fromkeys(matches, 0.0)
+            for docs in postings:
+                idf = math.log(1 + (count - len(docs) + 0.5) / (len(docs) + 0.5))
+                for doc_id in matches:
+                    tf = docs[doc_id]
+                    scores[doc_id] += idf * tf * (k1 + 1) / (tf + norms[doc_id])
+
+        # Only the requested page needs to be ordered
+        ranked = heapq.nsmallest(offset + limit, scores.items(), key=lambda item: (-item[1], -item[0]))
+        return len(scores), ranked[offset:]
+
+
+class SubmissionSearch:
+    """Ranked search over ContactSubmission.subject and .message."""
+
+    def __init__(self, db, model):
+        self.db = db
+        self.model = model
+        self.index = InvertedIndex()
+        self._last_id = None
+        self._lock = threading.Lock()
+
+    @property
+    def uses_postgres(self):
+        return self.db.engine.dialect.name == "postgresql"
+
+    def add(self, entry):
+        """Index a freshly committed submission (no-op on Postgres)."""
+        if self._last_id is None or self.uses_postgres:
+            return
+        self.index.add(entry.id, entry.subject, entry.message)
+
+    def reset(self):
+        """Drop the in-process index, e.g. after rows were deleted; the next search rebuilds it."""
+        with self._lock:
+            self.index = InvertedIndex()
+            self._last_id = None
+
+    def catch_up(self, batch_size=5000):
+        """Index rows inserted since the last search, e.g. by bulk imports or other workers."""
+        with self._lock:
+            model = self.model
+            while True:
+                rows = (
+                    self.db.session.query(model.id, model.subject, model.message)
+                    .filter(model.id > (self._last_id or 0))
+                    .order_by(model.id)
+                    .limit(batch_size)
+                    .all()
+                )
+                for row_id, subject, message in rows:
+                    # Rows indexed by add() on insert are already present
+                    if row_id not in self.index.lengths:
+                        self.index.add(row_id, subject, message)
+                if rows:
+                    self._last_id = rows[-1][0]
+                elif self._last_id is None:
+                    self._last_id = 0
+                if len(rows) < batch_size:
+                    return
+
+    def search(self, query, page=1, per_page=20):
+        """Return (total, [(submission, rank), ...]) for one page of results."""
+        offset = (page - 1) * per_page
+        if self.uses_postgres:
+            total, ranked = self._search_postgres(query, offset, per_page)
+        else:
+            self.catch_up()
+            total, ranked = self.index.search(query, offset, per_page)
+
+        rows = {row.id: row for row in self.model.query.filter(self.model.id.in_([i for i, _ in ranked]))}
+        return total, [(rows[row_id], rank) for row_id, rank in ranked if row_id in rows]
+
+    def _search_postgres(self, query, offset, limit):
+        table = self.model.__table__.name
+        params = {"query": query, "limit": limit, "offset": offset}
+
+        total = self.db.session.execute(text(
+            f"SELECT count(*) FROM {table} "
+            f"WHERE {SEARCH_COLUMN} @@ plainto_tsquery('english', :query)"
+        ), params).scalar()
+
+        ranked = self.db.session.execute(text(
+            f"SELECT id, ts_rank_cd({SEARCH_COLUMN}, q) AS rank "
+            f"FROM {table}, plainto_tsquery('english', :query) AS q "
+            f"WHERE {SEARCH_COLUMN} @@ q "
+            f"ORDER BY rank DESC, id DESC LIMIT :limit OFFSET :offset"
+        ), params).all()
+
+        return total, [(row.id, float(row.rank)) for row in ranked]
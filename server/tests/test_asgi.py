@@ -0,0 +1,143 @@
+import asyncio
+import json
+
+import pytest
+
+from conftest import call_asgi, submission
+from models import OutboxMessage, db
+from outbox import OutboxDispatcher
+
+
+@pytest.fixture
+def asgi(app_module):
+    import asgi
+    return asgi
+
+
+@pytest.mark.parametrize("body, content_type", [
+    (json.dumps(submission(1)), "application/json"),
+    (json.dumps(submission(2)), "text/plain"),
+    ("{not json", "application/json"),
+    ("{}", "application/json"),
+    ("[]", "application/json"),
+    (json.dumps(submission(3, email="nope", phone="")), "application/json"),
+])
+def test_contact_responses_match_flask(asgi, client, body, content_type):
+    expected = client.post("/contact", data=body, content_type=content_type)
+
+    # A fresh payload for successful submissions, so the ASGI request is not a duplicate
+    asgi_body = body.replace("@example.com", "@asgi.example.com").encode()
+
+    async def run():
+        application = asgi.ContactASGI(asgi.app)
+        await application.startup()
+        try:
+            return await call_asgi(application, "POST", "/contact", asgi_body, content_type)
+        finally:
+            await application.shutdown()
+
+    status, payload = asyncio.run(run())
+    assert status == expected.status_code
+    assert payload == expected.get_data()
+
+
+def queue_messages(app, count):
+    with app.app_context():
+        for i in range(count):
+            db.session.add(OutboxMessage(
+                subject=f"New Contact Form Submission: {i}",
+                recipient="admin@example.com",
+                reply_to=f"lead{i}@example.com",
+                body=f"Message {i}",
+            ))
+        db.session.commit()
+
+
+def drain(asgi, settings):
+    async def run():
+        dispatcher = asgi.AsyncOutboxDispatcher(settings=settings)
+        try:
+            return await dispatcher.drain_once(), dispatcher.pool.opened
+        finally:
+            await dispatcher.pool.close()
+    return asyncio.run(run())
+
+
+def test_async_dispatcher_sends_batch_over_one_connection(app, asgi, smtp_sink):
+    queue_messages(app, 3)
+    smtp_sink.fail_next(1)
+
+    sent, opened = drain(asgi, OutboxDispatcher(app, db, OutboxMessage, None, batch_size=10))
+
+    assert sent == 3
+    assert opened == 1
+    assert smtp_sink.wait_for(2)
+    assert smtp_sink.connections == 1
+
+    with app.app_context():
+        statuses = sorted((entry.status, entry.attempts) for entry in OutboxMessage.query)
+    assert statuses == [("pending", 1), ("sent", 0), ("sent", 0)]
+
+
+def test_async_dispatcher_sends_digest_over_threshold(app, asgi, smtp_sink):
+    queue_messages(app, 3)
+
+    settings = OutboxDispatcher(app, db, OutboxMessage, None, digest_threshold=2, digest_window=300)
+    sent, _ = drain(asgi, settings)
+
+    assert sent == 3
+    assert smtp_sink.wait_for(1)
+    assert len(smtp_sink.messages) == 1
+    assert "Contact Form Digest: 3 new submissions" in smtp_sink.messages[0]["data"]
+
+    with app.app_context():
+        assert {entry.status for entry in OutboxMessage.query} == {"digested"}
+
+
+def test_async_pool_enforces_max_messages_within_a_batch(app, asgi, smtp_sink):
+    envelopes = [("noreply@example.com", ["admin@example.com"], f"Subject: {i}\r\n\r\nBody".encode())
+                 for i in range(4)]
+
+    async def run():
+        pool = asgi.AsyncSMTPPool(dict(app.config, MAIL_POOL_MAX_MESSAGES=3))
+        try:
+            return await pool.send_batch(envelopes), pool.opened
+        finally:
+            await pool.close()
+
+    results, opened = asyncio.run(run())
+    assert results == [None] * 4
+    assert opened == 2
+    assert smtp_sink.wait_for(4)
+
+
+def test_async_batch_timeout_cancels_delivery_and_fails_each_message(app, asgi, monkeypatch):
+    queue_messages(app, 2)
+    delivering = []
+
+    async def hang(envelopes):
+        delivering.append(True)
+        try:
+            await asyncio.sleep(3600)
+        finally:
+            delivering.pop()
+
+    async def run():
+        settings = OutboxDispatcher(app, db, OutboxMessage, None, claim_timeout=0.4)
+        dispatcher = asgi.AsyncOutboxDispatcher(settings=settings)
+        monkeypatch.setattr(dispatcher.pool, "send_batch", hang)
+        sent = await dispatcher.drain_once()
+        # Let the loop run the cancellation
+        await asyncio.sleep(0.05)
+        return sent, dispatcher.send_timeout(2)
+
+    sent, timeout = asyncio.run(run())
+    assert sent == 2
+    assert timeout == 0.2
+    # The coroutine was cancelled rather than left delivering in the background
+    assert delivering == []
+
+    with app.app_context():
+        entries = OutboxMessage.query.all()
+    assert [(entry.status, entry.attempts) for entry in entries] == [("pending", 1), ("pending", 1)]
+    assert all("did not finish" in entry.last_error for entry in entries)
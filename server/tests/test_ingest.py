@@ -0,0 +1,143 @@
+import io
+import json
+
+import pytest
+
+import ingest
+from conftest import submission
+from ingest import IngestError, iter_json_array, iter_ndjson, iter_records
+from models import ContactSubmission, db
+
+
+def parse(raw, chunk_size=64 * 1024):
+    if isinstance(raw, str):
+        raw = raw.encode()
+    return list(iter_json_array(io.BytesIO(raw), chunk_size=chunk_size))
+
+
+# ---------------------------------------
+# JSON ARRAYS
+# ---------------------------------------
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 16, 64 * 1024])
+def test_records_split_across_chunks(chunk_size):
+    records = [submission(i) for i in range(5)] + [12345, "text, with ] and [", None, [1, [2]], -0.5e3]
+    raw = json.dumps(records, indent=2)
+
+    assert parse(raw, chunk_size) == records
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 5])
+def test_multibyte_characters_split_across_chunks(chunk_size):
+    records = [submission(0, name="Ñandú Ltd", message="Habari 🚀 — karibu")]
+
+    assert parse(json.dumps(records, ensure_ascii=False), chunk_size) == records
+
+
+def test_large_record_spanning_many_chunks():
+    records = [submission(0), submission(1, message="x" * 500_000), submission(2)]
+
+    assert parse(json.dumps(records), chunk_size=4096) == records
+
+
+def test_record_over_size_limit_is_rejected(monkeypatch):
+    monkeypatch.setattr(ingest, "MAX_RECORD_BYTES", 1000)
+    raw = json.dumps([submission(0), submission(1, message="x" * 5000)])
+
+    parsed = iter_json_array(io.BytesIO(raw.encode()), chunk_size=256)
+    assert next(parsed) == submission(0)
+    with pytest.raises(IngestError, match="larger than"):
+        next(parsed)
+
+
+@pytest.mark.parametrize("raw", ["[]", "  [ ]  ", "\n[\n]\n", "[1]\n"])
+def test_empty_and_padded_arrays(raw):
+    assert parse(raw) in ([], [1])
+
+
+@pytest.mark.parametrize("raw, error", [
+    ("", "Expected a JSON array"),
+    ('{"name": "Ada"}', "Expected a JSON array"),
+    ("[1,]", "Trailing ','"),
+    ("[1, 2 ,\n]", "Trailing ','"),
+    ("[,1]", "Unexpected ','"),
+    ("[1,,2]", "Unexpected ','"),
+    ("[1 2]", "Expected ','"),
+    ("[1] garbage", "after JSON array"),
+    ("[1]]", "after JSON array"),
+    ("[1][2]", "after JSON array"),
+    ("[1", "Unterminated"),
+    ("[1,", "Unterminated"),
+    ('[{"name": }]', "Invalid JSON"),
+])
+@pytest.mark.parametrize("chunk_size", [1, 3, 64 * 1024])
+def test_malformed_arrays_are_rejected(raw, error, chunk_size):
+    with pytest.raises(IngestError, match=error):
+        parse(raw, chunk_size)
+
+
+# ---------------------------------------
+# NDJSON
+# ---------------------------------------
+def test_ndjson_lines_split_across_chunks(monkeypatch):
+    lines = [json.dumps(submission(i)) for i in range(3)]
+    raw = ("\n".join(lines[:2]) + "\n\n  \n" + lines[2]).encode()
+
+    original = ingest.iter_lines
+    monkeypatch.setattr(ingest, "iter_lines", lambda stream: original(stream, chunk_size=5))
+
+    assert list(iter_ndjson(io.BytesIO(raw))) == [submission(i) for i in range(3)]
+
+
+def test_ndjson_invalid_line_is_reported_in_place():
+    raw = b'{"a": 1}\nnot json\n{"b": 2}\n'
+    first, bad, last = iter_records(io.BytesIO(raw), "application/x-ndjson; charset=utf-8")
+
+    assert first == {"a": 1}
+    assert isinstance(bad, IngestError) and "line 2" in str(bad)
+    assert last == {"b": 2}
+
+
+# ---------------------------------------
+# INSERTING
+# ---------------------------------------
+def test_ingest_reports_every_record_and_commits_batches(app):
+    records = [submission(0), submission(1, email="not-an-email"), submission(2), {"name": "Ada"}, submission(4)]
+
+    with app.app_context():
+        results = list(ingest.ingest(iter(records), db.session, ContactSubmission, batch_size=2))
+        assert ContactSubmission.query.count() == 3
+
+    assert [result["status"] for result in results[:-1]] == ["created", "invalid", "created", "invalid", "created"]
+    assert results[1]["errors"] == {"email": "Invalid email address"}
+    assert results[-1] == {"summary": {"received": 5, "created": 3, "invalid": 2, "failed": 0}}
+
+
+def test_ingest_reports_trailing_garbage_after_committed_records(app):
+    raw = (json.dumps([submission(0), submission(1)]) + " garbage").encode()
+
+    with app.app_context():
+        results = list(ingest.ingest(iter_records(io.BytesIO(raw), "application/json"),
+                                     db.session, ContactSubmission))
+        assert ContactSubmission.query.count() == 2
+
+    assert results[-2] == {"error": "Unexpected data after JSON array"}
+    assert results[-1]["summary"]["created"] == 2
+
+
+@pytest.mark.parametrize("body", ["", "   ", '{"name": "Ada"}', "null"])
+def test_bulk_rejects_a_body_that_is_not_an_array(client, body):
+    response = client.post("/contact/bulk", data=body, content_type="application/json",
+                           headers={"Authorization": "Bearer test-token"})
+
+    assert response.status_code == 400
+    assert response.get_json() == {"error": "Expected a JSON array of submissions"}
+
+
+def test_bulk_streams_results_for_an_array(client):
+    response = client.post("/contact/bulk", json=[submission(0), {"name": "Ada"}],
+                           headers={"Authorization": "Bearer test-token"})
+
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [line.get("status") for line in lines[:2]] == ["created", "invalid"]
+    assert lines[-1] == {"summary": {"received": 2, "created": 1, "invalid": 1, "failed": 0}}
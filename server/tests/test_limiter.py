@@ -0,0 +1,81 @@
+import asyncio
+import json
+import threading
+
+import pytest
+
+from conftest import call_asgi, submission
+from limiter import ContactLimiter, Decision, MemoryStore, create_limiter
+
+
+class RecordingStore(MemoryStore):
+    """Stand-in for a shared store that notes which thread called it."""
+
+    blocking = True
+
+    def __init__(self):
+        super().__init__()
+        self.threads = set()
+
+    def add_if_absent(self, key, ttl):
+        self.threads.add(threading.get_ident())
+        return super().add_if_absent(key, ttl)
+
+
+def test_ip_bucket_limits_bursts():
+    limiter = ContactLimiter(MemoryStore(), ip_per_minute=60, ip_burst=2, email_burst=100)
+
+    outcomes = [limiter.check("10.0.0.1", submission(i)).outcome for i in range(3)]
+    assert outcomes == [Decision.ALLOW, Decision.ALLOW, Decision.RATE_LIMITED]
+
+    decision = limiter.check("10.0.0.1", submission(9))
+    assert 0 < decision.retry_after <= 1
+    assert limiter.check("10.0.0.2", submission(10)).outcome == Decision.ALLOW
+    assert limiter.stats()["rate_limited_ip"] == 2
+
+
+def test_duplicates_are_suppressed_until_forgotten():
+    limiter = ContactLimiter(MemoryStore())
+
+    first = limiter.check("10.0.0.1", submission())
+    assert first.outcome == Decision.ALLOW
+    # Case and surrounding whitespace do not make a new submission
+    assert limiter.check("10.0.0.2", submission(email=" LEAD1@example.com ")).outcome == Decision.DUPLICATE
+
+    limiter.forget(first)
+    assert limiter.check("10.0.0.1", submission()).outcome == Decision.ALLOW
+    assert limiter.stats()["dedupe_hits"] == 1
+
+
+def test_create_limiter_accepts_a_stand_in_store():
+    store = RecordingStore()
+    limiter = create_limiter({"RATE_LIMIT_STORAGE_URL": "redis://unused"}, store=store)
+
+    assert limiter.store is store
+    assert limiter.blocking
+
+
+def test_asgi_runs_blocking_store_off_the_event_loop(app_module, monkeypatch):
+    import asgi
+
+    store = RecordingStore()
+    monkeypatch.setattr(app_module.limiter, "store", store)
+
+    async def run():
+        application = asgi.ContactASGI(asgi.app)
+        body = json.dumps(submission(email="dup@example.com")).encode()
+        # A duplicate is answered before the database is touched
+        store.add_if_absent(app_module.limiter.fingerprint(json.loads(body)), 60)
+        store.threads.clear()
+
+        status, _ = await call_asgi(application, "POST", "/contact", body)
+        return status, threading.get_ident()
+
+    status, loop_thread = asyncio.run(run())
+    assert status == 200
+    assert store.threads and loop_thread not in store.threads
+
+
+@pytest.mark.parametrize("store, blocking", [(MemoryStore(), False), (object(), True)])
+def test_blocking_defaults_to_true_for_unknown_stores(store, blocking):
+    assert ContactLimiter(store).blocking is blocking
@@ -0,0 +1,129 @@
+import smtplib
+import socket
+
+import pytest
+from flask_mail import Message
+
+from mail_transport import MailTransport, SMTPConnectionPool
+
+
+@pytest.fixture
+def make_transport(app):
+    transports = []
+
+    def make(**options):
+        transport = MailTransport()
+        transport.pool = SMTPConnectionPool(app.extensions["mail"], **options)
+        transports.append(transport)
+        return transport
+
+    yield make
+    for transport in transports:
+        transport.pool.close()
+
+
+@pytest.fixture
+def send(app):
+    """Send `count` messages as one batch; returns the per-message results."""
+    def send(transport, count):
+        with app.app_context():
+            messages = [
+                Message(subject=f"Message {i}", recipients=["admin@example.com"], body=f"Body {i}")
+                for i in range(count)
+            ]
+            return transport.send_batch(messages)
+    return send
+
+
+def idle(transport):
+    return list(transport.pool._idle.queue)
+
+
+def test_connection_is_reused_across_batches(smtp_sink, make_transport, send):
+    transport = make_transport()
+
+    assert send(transport, 2) == [None, None]
+    assert send(transport, 3) == [None, None, None]
+
+    assert smtp_sink.wait_for(5)
+    assert smtp_sink.connections == 1
+    assert transport.pool.opened == 1
+
+
+def test_rejected_message_keeps_the_connection(smtp_sink, make_transport, send):
+    transport = make_transport()
+    smtp_sink.fail_next(1)
+
+    first, *rest = send(transport, 3)
+
+    assert isinstance(first, smtplib.SMTPResponseException) and first.smtp_code == 451
+    assert rest == [None, None]
+    assert smtp_sink.wait_for(2)
+    assert smtp_sink.connections == 1
+
+
+def test_max_messages_is_enforced_within_a_batch(smtp_sink, make_transport, send):
+    transport = make_transport(max_messages=3)
+
+    assert send(transport, 4) == [None] * 4
+    assert smtp_sink.wait_for(4)
+
+    # The fourth message went out on a fresh connection; the full one was recycled
+    assert smtp_sink.connections == 2
+    assert transport.pool.recycled == 1
+    assert [pooled.sent for pooled in idle(transport)] == [1]
+
+
+def test_connection_is_recycled_after_max_age(smtp_sink, make_transport, send):
+    transport = make_transport(max_age=60)
+    send(transport, 1)
+
+    idle(transport)[0].created_at -= 61
+    send(transport, 1)
+
+    assert smtp_sink.wait_for(2)
+    assert smtp_sink.connections == 2
+    assert transport.pool.recycled == 1
+
+
+def test_idle_connection_is_health_checked_with_noop(smtp_sink, make_transport, send, monkeypatch):
+    transport = make_transport(check_after=30)
+    send(transport, 1)
+
+    noops = []
+    original = smtplib.SMTP.noop
+    monkeypatch.setattr(smtplib.SMTP, "noop", lambda host: noops.append(host) or original(host))
+
+    # Recently used: taken without a round trip
+    send(transport, 1)
+    assert noops == []
+
+    # Idle past check_after: NOOP first, and kept because the server answered
+    idle(transport)[0].last_used -= 31
+    send(transport, 1)
+    assert len(noops) == 1
+    assert smtp_sink.connections == 1
+
+    # A connection that died while idle fails its NOOP and is replaced
+    pooled = idle(transport)[0]
+    pooled.host.sock.shutdown(socket.SHUT_RDWR)
+    pooled.last_used -= 31
+    assert send(transport, 1) == [None]
+    assert len(noops) == 2
+    assert smtp_sink.connections == 2
+    assert transport.pool.recycled == 1
+
+
+def test_broken_connection_fails_the_rest_of_the_batch_and_is_dropped(smtp_sink, make_transport, send):
+    transport = make_transport()
+    send(transport, 1)
+
+    # Dies between checks: the batch fails, and the connection is not pooled again
+    idle(transport)[0].host.sock.shutdown(socket.SHUT_RDWR)
+    results = send(transport, 2)
+    assert all(isinstance(error, OSError) for error in results)
+    assert idle(transport) == []
+
+    assert send(transport, 2) == [None, None]
+    assert smtp_sink.wait_for(3)
+    assert smtp_sink.connections == 2
@@ -0,0 +1,115 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from metrics import Registry
+
+
+def make_registry(directory, pool=None):
+    registry = Registry(str(directory), flush_interval=3600)
+    requests = registry.counter("http_requests", "Requests handled", ["status"])
+    latency = registry.histogram("request_seconds", "Latency", buckets=(0.1, 1.0))
+    registry.gauge("db_pool_connections", "Pool", lambda: pool, shared="live")
+    registry.callback_counter("limiter_events", "Limiter decisions", lambda: {"allowed": 3}, ["event"])
+    return registry, requests, latency
+
+
+def samples(text):
+    return {
+        line.rsplit(" ", 1)[0]: float(line.rsplit(" ", 1)[1])
+        for line in text.splitlines() if line and not line.startswith("#")
+    }
+
+
+@pytest.fixture
+def dead_pid():
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+
+def test_every_worker_reports_the_same_totals(tmp_path):
+    first, first_requests, first_latency = make_registry(tmp_path, pool=5)
+    second, second_requests, second_latency = make_registry(tmp_path, pool=2)
+
+    first_requests.inc(status=200)
+    first_latency.observe(0.05)
+    second_requests.inc(3, status=200)
+    second_requests.inc(status=500)
+    second_latency.observe(0.5)
+    second.flush()
+
+    expected = {
+        'http_requests_total{status="200"}': 4,
+        'http_requests_total{status="500"}': 1,
+        'request_seconds_bucket{le="0.1"}': 1,
+        'request_seconds_bucket{le="1.0"}': 2,
+        'request_seconds_bucket{le="+Inf"}': 2,
+        'request_seconds_count': 2,
+        'request_seconds_sum': 0.55,
+        'db_pool_connections': 7,
+        'limiter_events_total{event="allowed"}': 6,
+    }
+    for registry in (first, second):
+        assert samples(registry.render()) == pytest.approx(expected)
+
+
+def test_scrapes_never_go_backwards(tmp_path):
+    first, first_requests, _ = make_registry(tmp_path)
+    second, second_requests, _ = make_registry(tmp_path)
+
+    first_requests.inc(5, status=200)
+    assert samples(first.render())['http_requests_total{status="200"}'] == 5
+
+    # Not yet flushed by `second`; `first`'s count comes from its snapshot
+    second_requests.inc(status=200)
+    assert samples(second.render())['http_requests_total{status="200"}'] == 6
+    assert samples(first.render())['http_requests_total{status="200"}'] == 6
+
+
+def test_exited_workers_keep_counters_but_not_gauges(tmp_path, dead_pid):
+    registry, requests, _ = make_registry(tmp_path, pool=1)
+    (tmp_path / f"metrics-{dead_pid}-deadbeef.json").write_text(
+        '{"http_requests": [[["200"], 10]], "db_pool_connections": [[[], 4]]}'
+    )
+
+    requests.inc(status=200)
+    values = samples(registry.render())
+
+    assert values['http_requests_total{status="200"}'] == 11
+    assert values["db_pool_connections"] == 1
+
+
+def test_other_files_in_the_directory_are_ignored(tmp_path):
+    registry, requests, _ = make_registry(tmp_path)
+    (tmp_path / "settings.json").write_text('{"http_requests": [[["200"], 10]]}')
+    (tmp_path / "metrics-notapid-deadbeef.json").write_text('{"http_requests": [[["200"], 10]]}')
+
+    requests.inc(status=200)
+
+    assert samples(registry.render())['http_requests_total{status="200"}'] == 1
+
+
+def test_forked_worker_starts_from_zero(tmp_path):
+    registry, requests, _ = make_registry(tmp_path)
+    requests.inc(2, status=200)
+    registry.flush()
+
+    pid = os.fork()
+    if pid == 0:
+        requests.inc(status=200)
+        registry.flush()
+        os._exit(0)
+    os.waitpid(pid, 0)
+
+    assert samples(registry.render())['http_requests_total{status="200"}'] == 3
+
+
+def test_counter_families_are_typed_with_their_sample_names(client):
+    text = client.get("/metrics").get_data(as_text=True)
+
+    assert "# TYPE contact_limiter_events_total counter" in text
+    assert "# TYPE http_requests_total counter" in text
+    assert "# TYPE db_pool_connections gauge" in text
@@ -0,0 +1,229 @@
+import os
+import subprocess
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+
+from conftest import submission
+from models import ContactSubmission, OutboxMessage, db
+from outbox import OutboxDispatcher
+
+
+@pytest.fixture
+def make_dispatcher(app, app_module):
+    def make(**options):
+        options.setdefault("backoff_base", 2.0)
+        return OutboxDispatcher(app, db, OutboxMessage, app_module.mail_transport.send_batch, **options)
+    return make
+
+
+def queue_message(app, **fields):
+    with app.app_context():
+        entry = OutboxMessage(**{
+            "subject": "New Contact Form Submission: Hello",
+            "recipient": "admin@example.com",
+            "reply_to": "lead@example.com",
+            "body": "Hello there",
+            **fields,
+        })
+        db.session.add(entry)
+        db.session.commit()
+        return entry.id
+
+
+def load(app, entry_id):
+    with app.app_context():
+        entry = db.session.get(OutboxMessage, entry_id)
+        db.session.expunge(entry)
+        return entry
+
+
+def make_due(app, entry_id):
+    with app.app_context():
+        db.session.get(OutboxMessage, entry_id).next_attempt_at = datetime.utcnow()
+        db.session.commit()
+
+
+def test_sends_pending_message(app, smtp_sink, make_dispatcher):
+    entry_id = queue_message(app)
+
+    assert make_dispatcher().drain_once() == 1
+    assert smtp_sink.wait_for(1)
+
+    message = smtp_sink.messages[0]
+    assert message["to"] == ["admin@example.com"]
+    assert "Hello there" in message["data"]
+
+    entry = load(app, entry_id)
+    assert entry.status == "sent"
+    assert entry.sent_at is not None
+    assert entry.attempts == 0
+
+
+def test_temporary_failure_is_retried_with_backoff(app, smtp_sink, make_dispatcher):
+    dispatcher = make_dispatcher(max_attempts=5)
+    entry_id = queue_message(app)
+    smtp_sink.fail_next(1)
+
+    before = datetime.utcnow()
+    assert dispatcher.drain_once() == 1
+    after = datetime.utcnow()
+
+    entry = load(app, entry_id)
+    assert entry.status == "pending"
+    assert entry.attempts == 1
+    assert "451" in entry.last_error
+    assert before + timedelta(seconds=2) <= entry.next_attempt_at <= after + timedelta(seconds=2)
+    assert smtp_sink.messages == []
+
+    # Not due again until the backoff has passed
+    assert dispatcher.drain_once() == 0
+
+    make_due(app, entry_id)
+    assert dispatcher.drain_once() == 1
+    assert smtp_sink.wait_for(1)
+
+    entry = load(app, entry_id)
+    assert entry.status == "sent"
+    assert entry.last_error is None
+
+
+def test_gives_up_after_max_attempts(app, smtp_sink, make_dispatcher):
+    dispatcher = make_dispatcher(max_attempts=2)
+    entry_id = queue_message(app)
+    smtp_sink.fail_next(2)
+
+    dispatcher.drain_once()
+    make_due(app, entry_id)
+    dispatcher.drain_once()
+
+    entry = load(app, entry_id)
+    assert entry.status == "failed"
+    assert entry.attempts == 2
+
+    make_due(app, entry_id)
+    assert dispatcher.drain_once() == 0
+    assert smtp_sink.messages == []
+
+
+def test_claimed_rows_are_not_claimed_twice(app, make_dispatcher):
+    first, second = make_dispatcher(), make_dispatcher()
+    entry_id = queue_message(app)
+
+    with app.app_context():
+        assert [entry.id for entry in first.claim_batch(10)] == [entry_id]
+    with app.app_context():
+        assert second.claim_batch(10) == []
+
+    assert load(app, entry_id).status == "sending"
+
+
+def test_expired_claim_is_picked_up_again(app, smtp_sink, make_dispatcher):
+    dispatcher = make_dispatcher(claim_timeout=60)
+    entry_id = queue_message(app)
+
+    with app.app_context():
+        dispatcher.claim_batch(10)
+
+    # The dispatcher holding the claim died before sending
+    assert dispatcher.drain_once() == 0
+    make_due(app, entry_id)
+    assert dispatcher.drain_once() == 1
+    assert smtp_sink.wait_for(1)
+    assert load(app, entry_id).status == "sent"
+
+
+def test_digest_folds_due_messages_per_recipient(app, smtp_sink, make_dispatcher):
+    for _ in range(3):
+        queue_message(app)
+    queue_message(app, recipient="sales@example.com")
+
+    assert make_dispatcher(digest_threshold=2).drain_once() == 4
+    assert smtp_sink.wait_for(2)
+
+    digests = {message["to"][0]: message["data"] for message in smtp_sink.messages}
+    assert "Contact Form Digest: 3 new submissions" in digests["admin@example.com"]
+    assert "Contact Form Digest: 1 new submissions" in digests["sales@example.com"]
+    assert len(smtp_sink.messages) == 2
+
+    with app.app_context():
+        assert {entry.status for entry in OutboxMessage.query} == {"digested"}
+
+
+def test_digest_window_is_shared_by_every_dispatcher(app, smtp_sink, make_dispatcher):
+    """Two workers' dispatchers on one table send one digest per window between them."""
+    first, second = (make_dispatcher(digest_threshold=2, digest_window=300) for _ in range(2))
+    for _ in range(3):
+        queue_message(app)
+
+    assert first.drain_once() == 3
+    assert smtp_sink.wait_for(1)
+
+    for _ in range(3):
+        queue_message(app)
+    assert second.drain_once() == 0
+    assert first.drain_once() == 0
+    assert len(smtp_sink.messages) == 1
+    assert "Contact Form Digest: 3 new submissions" in smtp_sink.messages[0]["data"]
+
+    # Once the window has passed, whichever dispatcher polls next sends the rest
+    with app.app_context():
+        for entry in OutboxMessage.query.filter_by(status="digested"):
+            entry.sent_at -= timedelta(seconds=301)
+        db.session.commit()
+    assert second.drain_once() == 3
+    assert smtp_sink.wait_for(2)
+
+
+def test_prune_deletes_only_old_finished_rows(app, make_dispatcher):
+    old = datetime.utcnow() - timedelta(days=30)
+    queue_message(app, status="sent", created_at=old)
+    queue_message(app, status="failed", created_at=old)
+    pending = queue_message(app, created_at=old)
+    recent = queue_message(app, status="sent")
+
+    assert make_dispatcher(retention=7 * 86400).prune() == 2
+
+    with app.app_context():
+        remaining = {entry.id for entry in OutboxMessage.query}
+    assert remaining == {pending, recent}
+
+
+def test_failed_commit_rolls_back_submission_and_outbox_row(app, app_module, client, monkeypatch):
+    payload = submission(subject="Rollback", message="Both rows or neither")
+
+    # No recipient violates outbox_message.recipient NOT NULL at commit time,
+    # after the submission row has already been flushed
+    monkeypatch.setattr(app_module, "ADMIN_EMAIL", None)
+    response = client.post("/contact", json=payload)
+    assert response.status_code == 500
+
+    with app.app_context():
+        assert ContactSubmission.query.count() == 0
+        assert OutboxMessage.query.count() == 0
+
+    # The dedupe entry was dropped, so the client's retry goes through
+    monkeypatch.setattr(app_module, "ADMIN_EMAIL", "admin@example.com")
+    response = client.post("/contact", json=payload)
+    assert response.status_code == 200
+
+    with app.app_context():
+        assert ContactSubmission.query.count() == 1
+        assert OutboxMessage.query.count() == 1
+
+
+def test_importing_app_starts_no_threads(tmp_path):
+    """`flask db upgrade`, `python outbox.py` and a preloading master only import app."""
+    env = dict(
+        os.environ,
+        DATABASE_URL=f"sqlite:///{tmp_path / 'import.db'}",
+        MAIL_PORT="1025",
+        METRICS_MULTIPROC_DIR=str(tmp_path / "metrics"),
+        OUTBOX_DISPATCHER="thread",
+    )
+    code = "import threading, app; print(sorted(t.name for t in threading.enumerate()))"
+    output = subprocess.run([sys.executable, "-c", code], env=env, cwd=os.path.dirname(os.path.dirname(__file__)),
+                            capture_output=True, text=True, check=True).stdout
+
+    assert output.strip() == "['MainThread']"
@@ -0,0 +1,136 @@
+import base64
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event, insert
+
+from models import ContactSubmission, db
+from pagination import InvalidCursor, decode_cursor, encode_cursor, keyset_page, parse_datetime
+
+HEADERS = {"Authorization": "Bearer test-token"}
+START = datetime(2024, 1, 1)
+
+
+@pytest.fixture
+def seeded(app):
+    """250 submissions, five to a timestamp so the id tie-breaker matters."""
+    with app.app_context():
+        db.session.execute(insert(ContactSubmission.__table__), [
+            {
+                "name": f"Lead {i}",
+                "email": f"lead{i % 3}@example.com",
+                "phone": "0700000000",
+                "subject": f"Subject {i % 2}",
+                "message": "Seeded message",
+                "created_at": START + timedelta(minutes=i // 5),
+            }
+            for i in range(250)
+        ])
+        db.session.commit()
+
+        rows = ContactSubmission.query.all()
+        return sorted(rows, key=lambda row: (row.created_at, row.id), reverse=True)
+
+
+def walk(client, limit, **params):
+    """Follow next_cursor through every page; return the ids in order."""
+    ids, cursor, pages = [], None, 0
+    while True:
+        query = dict(params, limit=limit, **({"cursor": cursor} if cursor else {}))
+        response = client.get("/admin/submissions", query_string=query, headers=HEADERS)
+        assert response.status_code == 200
+
+        body = response.get_json()
+        assert len(body["submissions"]) <= limit
+        ids += [row["id"] for row in body["submissions"]]
+        pages += 1
+
+        cursor = body["next_cursor"]
+        if cursor is None:
+            return ids, pages
+
+
+def test_cursor_round_trip():
+    created_at = datetime(2024, 5, 17, 8, 30, 12, 345678)
+    assert decode_cursor(encode_cursor(created_at, 42)) == (created_at, 42)
+
+
+@pytest.mark.parametrize("limit", [1, 7, 50, 249, 250, 500])
+def test_walks_every_row_once_across_timestamp_ties(client, seeded, limit):
+    ids, pages = walk(client, limit)
+
+    assert ids == [row.id for row in seeded]
+    assert pages == max(1, -(-len(seeded) // limit))
+
+
+def test_walk_with_filters(client, seeded):
+    ids, _ = walk(client, 4, email="lead1@example.com", created_after="2024-01-01T00:10:00",
+                  created_before="2024-01-01T03:30:00+03:00")
+
+    expected = [
+        row.id for row in seeded
+        if row.email == "lead1@example.com"
+        and START + timedelta(minutes=10) <= row.created_at < START + timedelta(minutes=30)
+    ]
+    assert expected and ids == expected
+
+
+def test_aware_datetimes_are_converted_to_utc():
+    assert parse_datetime("2024-01-01T03:00:00+03:00") == datetime(2024, 1, 1)
+    assert parse_datetime("2024-01-01T03:00:00") == datetime(2024, 1, 1, 3)
+
+
+@pytest.mark.parametrize("cursor", [
+    "not a cursor",
+    "!!!!",
+    base64.urlsafe_b64encode(b"not json").decode(),
+    base64.urlsafe_b64encode(json.dumps({"a": 1}).encode()).decode(),
+    base64.urlsafe_b64encode(json.dumps(["2024-01-01T00:00:00"]).encode()).decode(),
+    base64.urlsafe_b64encode(json.dumps(["yesterday", 1]).encode()).decode(),
+    base64.urlsafe_b64encode(json.dumps(["2024-01-01T00:00:00", "x"]).encode()).decode(),
+    base64.urlsafe_b64encode(json.dumps([None, 1]).encode()).decode(),
+])
+def test_invalid_cursor(client, cursor):
+    with pytest.raises(InvalidCursor):
+        decode_cursor(cursor)
+
+    response = client.get("/admin/submissions", query_string={"cursor": cursor}, headers=HEADERS)
+    assert response.status_code == 400
+    assert response.get_json() == {"error": "Invalid cursor"}
+
+
+def test_requires_admin_token(client):
+    assert client.get("/admin/submissions").status_code == 401
+
+
+def test_deep_page_is_an_index_range_scan(app, seeded):
+    """Page N reads a bounded range of the (created_at, id) index, never sorting or skipping rows."""
+    anchor = seeded[200]
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    with app.app_context():
+        event.listen(db.engine, "before_cursor_execute", capture)
+        try:
+            rows, _ = keyset_page(
+                ContactSubmission.query, ContactSubmission.created_at, ContactSubmission.id,
+                10, encode_cursor(anchor.created_at, anchor.id),
+            )
+        finally:
+            event.remove(db.engine, "before_cursor_execute", capture)
+
+        assert [row.id for row in rows] == [row.id for row in seeded[201:211]]
+
+        (statement, parameters), = statements
+        plan = " ".join(
+            row[-1] for row in db.session.connection().exec_driver_sql(
+                "EXPLAIN QUERY PLAN " + statement, parameters
+            )
+        )
+
+    assert "ix_contact_submissions_created_at_id" in plan
+    assert "TEMP B-TREE" not in plan
+
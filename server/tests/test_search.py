@@ -0,0 +1,43 @@
+from conftest import submission
+from models import ContactSubmission, OutboxMessage
+
+HEADERS = {"Authorization": "Bearer test-token"}
+
+
+def submit(client, i, subject, message):
+    return client.post("/contact", json=submission(i, email=f"search{i}@example.com",
+                                                   subject=subject, message=message))
+
+
+def test_search_ranks_new_submissions(client):
+    submit(client, 1, "Website redesign", "We need a new website for Acme")
+    submit(client, 2, "Acme mobile app", "Acme wants an app. Acme also needs hosting")
+    submit(client, 3, "Hello", "Unrelated enquiry")
+
+    response = client.get("/admin/submissions/search", query_string={"q": "acme"}, headers=HEADERS)
+    body = response.get_json()
+
+    assert body["total"] == 2
+    assert [row["subject"] for row in body["results"]] == ["Acme mobile app", "Website redesign"]
+
+
+def test_index_failure_does_not_fail_committed_submission(app, app_module, client, monkeypatch):
+    def broken(entry):
+        raise RuntimeError("index unavailable")
+
+    monkeypatch.setattr(app_module.search_index, "add", broken)
+    response = submit(client, 4, "Globex fit-out", "Office fit-out for Globex")
+    assert response.status_code == 200
+
+    with app.app_context():
+        assert ContactSubmission.query.count() == 1
+        assert OutboxMessage.query.count() == 1
+
+    # A retry is acknowledged as a duplicate, not stored again
+    assert submit(client, 4, "Globex fit-out", "Office fit-out for Globex").status_code == 200
+    with app.app_context():
+        assert ContactSubmission.query.count() == 1
+
+    monkeypatch.undo()
+    response = client.get("/admin/submissions/search", query_string={"q": "globex"}, headers=HEADERS)
+    assert response.get_json()["total"] == 1